@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from litho import masks, metrology, optics, resist  # noqa: E402
+
+# ============================================================
+# Pipeline benchmarks
+# ============================================================
+# One fixed-seed workload per pipeline stage, modelled on the scripts:
+#
+#   psf          pupil -> PSF -> defocus blur            (day2)
+#   aerial_fft   two-line mask, full-field FFT imaging   (day3)
+#   aerial_auto  same mask, sparse/FFT auto selection
+#   resist       Dill -> Mack -> printed map             (day5, day6)
+#   edges        sub-pixel profile edges + row edges     (day7, day10)
+#   epe_edt      distance-field EPE map                  (day12)
+#   mc_trials    10 shot-noise trials of a single line   (day14 - day19)
+#   psd          edge-roughness PSD + autocorrelation    (day20)
+#
+# at nx = 128 ... 2048, with the pupil radius scaled as 60/512 of nx.
+# Results go to benchmarks/results/<commit>.json; --compare prints the
+# ratio to an earlier file and flags slowdowns beyond --threshold.
+#
+#   python benchmarks/bench_pipeline.py [--sizes 128 512] [--cases psf resist]
+#                                       [--compare benchmarks/results/<old>.json]
+
+SIZES = [128, 256, 512, 1024, 2048]
+MIN_TIME = 0.2                  # seconds of repeated calls per measurement
+MAX_REPEATS = 50
+MC_TRIALS = 10
+PHOTONS_PER_PIXEL = 2000
+SEED = 2024
+
+def _setup(nx):
+    rng = np.random.default_rng(SEED)
+    radius = max(4, round(nx * 60 / 512))
+    mask = masks.two_lines_mask(nx)
+    psf = optics.make_psf(nx, radius, 1.5)
+    aerial = optics.aerial_image(mask, psf, method="fft")
+    aerial = aerial / aerial.max()
+    clear = resist.clear_depth(aerial)
+    printed = clear > resist.RESIST["resist_thickness"]
+    line = optics.aerial_image(masks.plain_line(nx), psf, method="fft")
+    return {"nx": nx, "rng": rng, "radius": radius, "mask": mask, "psf": psf,
+            "aerial": aerial, "clear": clear, "printed": printed, "line": line / line.max()}
+
+def bench_psf(s):
+    psf = optics.psf_from_pupil(optics.circular_pupil(s["nx"], s["radius"]))
+    return optics.defocus_psf(psf, 1.5)
+
+def bench_aerial_fft(s):
+    return optics.aerial_image(s["mask"], s["psf"], method="fft")
+
+def bench_aerial_auto(s):
+    return optics.aerial_image(s["mask"], s["psf"], method="auto")
+
+def bench_resist(s):
+    return resist.develop(s["aerial"])
+
+def bench_edges(s):
+    nx = s["nx"]
+    edges = metrology.find_edges_subpixel(s["clear"][nx // 2], resist.RESIST["resist_thickness"])
+    return edges, metrology.row_edges(s["printed"])
+
+def bench_epe_edt(s):
+    return metrology.distance_epe(s["mask"], s["printed"])
+
+def _trial_edges(s):
+    photons = PHOTONS_PER_PIXEL
+    lefts = []
+    for _ in range(MC_TRIALS):
+        noisy = s["rng"].poisson(s["line"] * photons) / photons
+        left, _ = metrology.row_edges(resist.develop(noisy))
+        lefts.append(left)
+    return np.array(lefts)
+
+def bench_mc_trials(s):
+    return _trial_edges(s)
+
+def bench_psd(s):
+    if "edges" not in s:
+        edges = _trial_edges(s)
+        edges = edges[:, ~np.isnan(edges).any(axis=0)]
+        s["edges"] = edges - edges.mean(axis=0)
+    dev = s["edges"]
+    psd = np.mean(np.abs(np.fft.fft(dev, axis=1))**2, axis=0)[:dev.shape[1] // 2]
+    centred = dev - dev.mean(axis=1, keepdims=True)
+    auto = np.mean([np.correlate(d, d, mode="full")[d.size - 1:] for d in centred], axis=0)
+    return psd, auto
+
+CASES = {
+    "psf": bench_psf,
+    "aerial_fft": bench_aerial_fft,
+    "aerial_auto": bench_aerial_auto,
+    "resist": bench_resist,
+    "edges": bench_edges,
+    "epe_edt": bench_epe_edt,
+    "mc_trials": bench_mc_trials,
+    "psd": bench_psd,
+}
+
+# ============================================================
+# Timing
+# ============================================================
+def measure(fn, state):
+    fn(state)                   # warm-up: lazy imports, caches, allocator
+    times = []
+    start = time.perf_counter()
+    while len(times) < MAX_REPEATS and (time.perf_counter() - start < MIN_TIME or len(times) < 3):
+        t = time.perf_counter()
+        fn(state)
+        times.append(time.perf_counter() - t)
+    times = np.array(times)
+    return {"min": times.min(), "median": float(np.median(times)), "repeats": len(times)}
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+def compare(results, old, threshold):
+    """Print new/old median ratios; returns the number of regressions."""
+    regressions = 0
+    for case, sizes in results.items():
+        for nx, r in sizes.items():
+            base = old.get(case, {}).get(nx)
+            if base is None:
+                continue
+            ratio = r["median"] / base["median"]
+            flag = ""
+            if ratio > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{case:<12} {nx:>5}  {ratio:6.2f}x{flag}")
+    return regressions
+
+# ============================================================
+# Run
+# ============================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="litho pipeline benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="median slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    meta = metadata()
+    results = {case: {} for case in args.cases}
+    for nx in args.sizes:
+        state = _setup(nx)
+        for case in args.cases:
+            r = measure(CASES[case], state)
+            results[case][str(nx)] = r
+            print(f"{case:<12} {nx:>5}  median {r['median'] * 1e3:9.3f} ms  "
+                  f"min {r['min'] * 1e3:9.3f} ms  ({r['repeats']} runs)")
+
+    out = args.out or os.path.join(REPO_DIR, "benchmarks", "results", f"{meta['commit']}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+    print("Results saved to:", out)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)["results"]
+        sys.exit(1 if compare(results, old, args.threshold) else 0)
@@ -0,0 +1,71 @@
+import argparse
+import importlib.util
+import os
+import sys
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from litho import cache, fft  # noqa: E402
+
+# ============================================================
+# FFT backend agreement
+# ============================================================
+# Runs the transforms the imaging code uses - fft2 / ifft2 / rfft2 /
+# irfft2 with s= padding, batched stacks, 1-D fft along an axis, and
+# convolve_same - on every backend litho.fft can select and compares
+# them with numpy.fft.  Each case runs twice, so pyFFTW's cached plans
+# (and their reused output buffers) are exercised.  Backends whose
+# library is not installed are reported as skipped.
+#
+#   python benchmarks/check_fft_backends.py [--rtol 1e-10]
+
+BACKENDS = {"scipy": "scipy", "pyfftw": "pyfftw"}
+SEED = 2024
+
+def _cases():
+    rng = np.random.default_rng(SEED)
+    real = rng.standard_normal((3, 60, 50))
+    cplx = rng.standard_normal((60, 50)) + 1j * rng.standard_normal((60, 50))
+    kernel = rng.random((9, 9))
+    return {
+        "fft2": lambda: fft.fft2(cplx),
+        "ifft2": lambda: fft.ifft2(cplx),
+        "rfft2 batched, padded": lambda: fft.rfft2(real, s=(64, 54)),
+        "irfft2 batched, padded": lambda: fft.irfft2(fft.rfft2(real, s=(64, 54)), s=(64, 54)),
+        "fft axis 0": lambda: fft.fft(cplx, axis=0),
+        "ifft axis 1": lambda: fft.ifft(cplx, axis=1),
+        "convolve_same": lambda: fft.convolve_same(real, kernel),
+    }
+
+def _run(name):
+    fft.set_backend(name)
+    first = {case: np.array(fn()) for case, fn in _cases().items()}
+    second = {case: np.array(fn()) for case, fn in _cases().items()}
+    return first, second
+
+def check(rtol):
+    reference, _ = _run("numpy")
+    failures = 0
+    for name, library in BACKENDS.items():
+        if importlib.util.find_spec(library) is None:
+            print(f"{name:>7}: skipped ({library} not installed)")
+            continue
+        first, second = _run(name)
+        for case, ref in reference.items():
+            scale = np.abs(ref).max()
+            err = max(np.abs(first[case] - ref).max(), np.abs(second[case] - ref).max()) / scale
+            ok = err <= rtol
+            failures += not ok
+            print(f"{name:>7}: {case:<24} rel. error {err:.1e} {'ok' if ok else 'FAIL'}")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="compare litho.fft backends with numpy.fft")
+    parser.add_argument("--rtol", type=float, default=1e-10)
+    args = parser.parse_args()
+    # no wisdom or other cache files from a check
+    cache.configure(enabled=False)
+    sys.exit(1 if check(args.rtol) else 0)
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+
+# ============================================================
+# Import-time guard for the litho package
+# ============================================================
+# Imports each hot-path module in a fresh interpreter and checks that
+#   - scipy / matplotlib / plotly are not loaded, and
+#   - the import costs at most BUDGET_MS on top of NumPy itself.
+# Exits non-zero on any violation, so it can gate a CI job:
+#
+#   python benchmarks/import_time.py [--json out.json]
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["litho.cli", "litho.config", "litho.experiments", "litho.graph"]
+HEAVY = ["scipy", "matplotlib", "plotly"]
+BUDGET_MS = 60.0
+REPEATS = 7
+
+PROBE = """
+import sys, time
+t = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t
+print(dt, ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+def probe(module):
+    """Best-of-REPEATS import time in seconds, and the heavy modules it pulled in."""
+    best, heavy = float("inf"), ""
+    for _ in range(REPEATS):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        best = min(best, float(out[0]))
+        heavy = out[1] if len(out) > 1 else ""
+    return best, heavy
+
+# ============================================================
+# Run
+# ============================================================
+if __name__ == "__main__":
+    baseline, _ = probe("numpy")
+    results = {"numpy_ms": baseline * 1e3, "budget_ms": BUDGET_MS, "modules": {}}
+    failed = False
+
+    print(f"{'numpy':<20} {baseline * 1e3:7.1f} ms (baseline)")
+    for module in MODULES:
+        seconds, heavy = probe(module)
+        extra_ms = (seconds - baseline) * 1e3
+        ok = extra_ms <= BUDGET_MS and not heavy
+        failed |= not ok
+        results["modules"][module] = {"ms": seconds * 1e3, "extra_ms": extra_ms, "heavy": heavy, "ok": ok}
+        note = f"  loads {heavy}" if heavy else ""
+        print(f"{module:<20} {seconds * 1e3:7.1f} ms  (+{extra_ms:5.1f}){note}  {'ok' if ok else 'FAIL'}")
+
+    if "--json" in sys.argv:
+        with open(sys.argv[sys.argv.index("--json") + 1], "w") as f:
+            json.dump(results, f, indent=1)
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,4 @@
+"""
+Shared engines for the week1-week4 lithography scripts: pattern
+generators, optical imaging, resist models and metrology.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from litho.cli import main
+
+sys.exit(main())
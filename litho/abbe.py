@@ -0,0 +1,97 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from litho import fft, optics
+from litho.source import source_points
+from litho.tcc import shifted_pupil
+
+# ============================================================
+# Abbe source-point integration
+# ============================================================
+# Reference path for partially coherent imaging: every source point
+# illuminates the mask coherently and the intensities add up,
+#
+#     I(x) = sum_s  S(s) |ifft(M(f) * P(f + s))|^2
+#
+# The mask spectrum M is computed once; source points are processed in
+# vectorised batches (one batched ifft2 per batch) and, optionally,
+# split across worker processes that each receive the spectrum once.
+
+_WORKER = {}
+
+def _init_worker(spectrum, pupil_radius, defocus, fft_workers):
+    _WORKER.update(
+        spectrum=spectrum,
+        pupil_radius=pupil_radius,
+        defocus=defocus,
+        fft_workers=fft_workers,
+    )
+
+def _integrate(sx, sy, weight, batch):
+    spectrum = _WORKER["spectrum"]
+    ny, nx = spectrum.shape
+    fy = (np.fft.fftfreq(ny) * ny)[:, None]
+    fx = (np.fft.fftfreq(nx) * nx)[None, :]
+
+    aerial = np.zeros((ny, nx))
+    for i in range(0, len(sx), batch):
+        bx = sx[i:i + batch, None, None]
+        by = sy[i:i + batch, None, None]
+        pupils = shifted_pupil(fx + bx, fy + by, _WORKER["pupil_radius"], _WORKER["defocus"])
+        field = fft.ifft2(pupils * spectrum, workers=_WORKER["fft_workers"], overwrite_x=True)
+        aerial += np.einsum("s,syx->yx", weight[i:i + batch], field.real**2 + field.imag**2)
+    return aerial
+
+def abbe_aerial(mask, pupil_radius, source, dose=1.0, step=0.1, defocus=0.0,
+                batch=8, processes=None):
+    """
+    Partially coherent aerial image by explicit source integration.
+
+    processes=None runs in-process with a multithreaded FFT; an integer
+    splits the source points across that many worker processes.
+    """
+    sx, sy, weight = source_points(source, step)
+    sx, sy = sx * pupil_radius, sy * pupil_radius
+    spectrum = fft.fft2(mask)
+
+    if not processes or processes == 1:
+        _init_worker(spectrum, pupil_radius, defocus, -1)
+        try:
+            aerial = _integrate(sx, sy, weight, batch)
+        finally:
+            _WORKER.clear()
+        return aerial * dose
+
+    chunks = np.array_split(np.arange(len(sx)), processes)
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(spectrum, pupil_radius, defocus, 1),
+    ) as pool:
+        parts = [
+            pool.submit(_integrate, sx[idx], sy[idx], weight[idx], batch)
+            for idx in chunks if len(idx)
+        ]
+        aerial = sum(part.result() for part in parts)
+    return aerial * dose
+
+# ============================================================
+# Comparison with the incoherent fftconvolve path
+# ============================================================
+def incoherent_reference(mask, pupil_radius, focus_sigma=0.0):
+    """optics.aerial_image rescaled so that an open frame images to 1, like abbe/tcc."""
+    psf = optics.make_psf(mask.shape[0], pupil_radius, focus_sigma)
+    aerial = optics.aerial_image(mask, psf, method="fft")
+    return aerial / optics.psf_kernel(psf).sum()
+
+def compare_to_incoherent(mask, pupil_radius, source, **kwargs):
+    partial = abbe_aerial(mask, pupil_radius, source, **kwargs)
+    incoherent = incoherent_reference(mask, pupil_radius)
+    diff = partial - incoherent
+    return {
+        "abbe": partial,
+        "incoherent": incoherent,
+        "max_abs_diff": float(np.abs(diff).max()),
+        "rms_diff": float(np.sqrt(np.mean(diff**2))),
+    }
@@ -0,0 +1,96 @@
+import numpy as np
+
+from litho import config, sweep, telemetry
+
+# ============================================================
+# Adaptive process-window sampling
+# ============================================================
+#   "sampling": {"method": "adaptive", "axis": "dose", "coarse": 5,
+#                "output": "epe", "limit": 3}
+#
+# The sweep is still a grid, but along one axis (default: the last,
+# usually dose) each line is first evaluated at `coarse` evenly spaced
+# cells including both ends.  Wherever two neighbouring evaluated cells
+# disagree on being in spec, the cell halfway between them is evaluated
+# next, until every change of state sits between adjacent grid cells.
+# Runs of cells between two evaluated cells in the same state take that
+# state without being simulated.
+#
+# The spec test is |output - target| <= limit, or lo <= output <= hi
+# (e.g. "output": "open", "lo": 0.5 for an open-probability contour).
+# Refinement goes breadth-first over all lines, so every round is one
+# batch of points and shares prefetched aerials like a normal sweep.
+#
+# The result has the full grid shape: metric outputs where a cell was
+# simulated (NaN elsewhere), "in_spec" everywhere and "evaluated".
+# The boundary matches the dense grid wherever the window crosses each
+# coarse interval at most once; raise "coarse" for windows narrower
+# than the coarse step.
+
+def in_spec(outputs, sampling):
+    value = outputs.get(sampling["output"], np.nan)
+    if not np.isfinite(value):
+        return False
+    if "limit" in sampling:
+        return abs(value - sampling.get("target", 0.0)) <= sampling["limit"]
+    return sampling.get("lo", -np.inf) <= value <= sampling.get("hi", np.inf)
+
+def coarse_indices(n, coarse):
+    return sorted(set(np.linspace(0, n - 1, max(2, min(coarse, n))).round().astype(int).tolist()))
+
+def midpoints(known):
+    """Cells halfway between evaluated neighbours whose states differ."""
+    cells = sorted(known)
+    return [(a + b) // 2 for a, b in zip(cells, cells[1:]) if b - a > 1 and known[a] != known[b]]
+
+def fill(known, n):
+    """States of all n cells of a line from its evaluated cells."""
+    cells = sorted(known)
+    states = np.zeros(n, dtype=bool)
+    for a, b in zip(cells, cells[1:]):
+        states[a:b] = known[a]
+    states[cells[-1]:] = known[cells[-1]]
+    return states
+
+def run(spec, evaluate):
+    """
+    Adaptive sweep of spec; evaluate(points) maps a list of (index,
+    point spec) to a list of output dicts.  Returns (axes, shape, results).
+    """
+    sampling = spec["sampling"]
+    axes = {path: config.axis_values(axis) for path, axis in spec["sweep"].items()}
+    names = list(axes)
+    along = names.index(sampling.get("axis", names[-1]))
+    shape = tuple(len(v) for v in axes.values())
+    n = shape[along]
+    lines = list(np.ndindex(*(shape[:along] + shape[along + 1:])))
+
+    def point(line, i):
+        index = line[:along] + (i,) + line[along:]
+        assignment = {path: axes[path][j].item() for path, j in zip(names, index)}
+        return index, sweep.point_spec(spec, assignment)
+
+    results = {}
+    known = {line: {} for line in lines}
+    todo = [(line, i) for line in lines for i in coarse_indices(n, sampling.get("coarse", 5))]
+    while todo:
+        telemetry.count("adaptive_rounds")
+        batch = [point(line, i) for line, i in todo]
+        for (line, i), (index, _), outputs in zip(todo, batch, evaluate(batch)):
+            known[line][i] = in_spec(outputs, sampling)
+            for key, value in outputs.items():
+                if key not in results:
+                    results[key] = np.full(shape, np.nan)
+                results[key][index] = value
+        todo = [(line, i) for line in lines for i in midpoints(known[line])]
+
+    in_window = np.zeros(shape)
+    evaluated = np.zeros(shape)
+    for line in lines:
+        where = line[:along] + (slice(None),) + line[along:]
+        in_window[where] = fill(known[line], n)
+        evaluated[where][sorted(known[line])] = 1.0
+    telemetry.count("adaptive_skipped", int(evaluated.size - evaluated.sum()))
+    results["in_spec"] = in_window
+    results["evaluated"] = evaluated
+    return axes, shape, results
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from litho import telemetry
+
+# ============================================================
+# Content-hash stage cache
+# ============================================================
+# Every pipeline stage (PSF, aerial, resist, metric) is keyed by a hash
+# of its own inputs, which include the keys of the stages it reads.
+# Results live in memory for the process and, for stages worth keeping
+# across runs, as .npz files under CACHE_DIR/stages/<stage>/.  A sweep
+# that only changes resist "n" therefore finds every PSF and aerial
+# image of an earlier run and recomputes resist and metrics only.
+
+CACHE_DIR = os.environ.get(
+    "LITHO_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "litho")
+)
+
+ENABLED = True                  # read / write the disk cache
+MEMORY_SIZE = 256               # entries per stage before the stage is flushed
+
+_MEMORY = {}
+STATS = {}
+
+def configure(enabled=None, cache_dir=None):
+    global ENABLED, CACHE_DIR
+    if enabled is not None:
+        ENABLED = enabled
+    if cache_dir is not None:
+        CACHE_DIR = cache_dir
+
+def digest(obj):
+    text = json.dumps(obj, sort_keys=True, default=float)
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+def _path(stage, key):
+    return os.path.join(CACHE_DIR, "stages", stage, f"{key}.npz")
+
+def _save(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp.npz"
+    if isinstance(value, dict):
+        np.savez(tmp, **value)
+    else:
+        np.savez(tmp, __value__=value)
+    os.replace(tmp, path)
+
+def _load(path):
+    with np.load(path) as data:
+        if data.files == ["__value__"]:
+            return data["__value__"]
+        return {name: data[name][()] if data[name].ndim == 0 else data[name] for name in data.files}
+
+def _count(stage, event):
+    counts = STATS.setdefault(stage, {"memory": 0, "disk": 0, "computed": 0})
+    counts[event] += 1
+
+def key(name, inputs):
+    """Key of a stage; downstream stages list it among their inputs."""
+    return digest([name, inputs])
+
+def contains(name, inputs, disk=True):
+    k = key(name, inputs)
+    if k in _MEMORY.get(name, {}):
+        return True
+    return ENABLED and disk and os.path.exists(_path(name, k))
+
+def stage(name, inputs, compute, disk=True):
+    """
+    Value of stage `name` for `inputs` (any JSON-able object), from
+    memory, then disk, else compute() and store.  compute() should fetch
+    upstream stages itself, so a cached stage never touches them.
+    """
+    k = key(name, inputs)
+    memory = _MEMORY.setdefault(name, {})
+    if k in memory:
+        _count(name, "memory")
+        return memory[k]
+
+    path = _path(name, k)
+    if ENABLED and disk and os.path.exists(path):
+        with telemetry.timer("cache_io"):
+            value = _load(path)
+        _count(name, "disk")
+    else:
+        value = compute()
+        _count(name, "computed")
+        if ENABLED and disk:
+            with telemetry.timer("cache_io"):
+                _save(path, value)
+
+    if len(memory) >= MEMORY_SIZE:
+        memory.clear()
+    memory[k] = value
+    return value
+
+def clear_memory():
+    _MEMORY.clear()
+    STATS.clear()
+
+def stats_since(snapshot):
+    """STATS counts accumulated since snapshot (a deep copy of STATS)."""
+    out = {}
+    for name, counts in STATS.items():
+        before = snapshot.get(name, {})
+        out[name] = {event: n - before.get(event, 0) for event, n in counts.items()}
+    return out
+
+def report():
+    lines = []
+    for name, counts in STATS.items():
+        lines.append(f"{name:>8}: {counts['computed']} computed, "
+                     f"{counts['memory']} memory hits, {counts['disk']} disk hits")
+    return "\n".join(lines)
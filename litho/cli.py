@@ -0,0 +1,127 @@
+import argparse
+import copy
+import sys
+import time
+
+from litho import config
+
+# ============================================================
+# litho command line
+# ============================================================
+#   python -m litho run spec.json [more.toml ...] [--set path=value ...]
+#   python -m litho report results/<name> [...]
+#   python -m litho replay spec.json --set dose=0.9 --trial 7 [--trial 12 ...]
+#   python -m litho list
+#
+# Every spec file may expand into many experiments (see litho.config);
+# they all run in this one process, so optics and mask caches are
+# shared across variants and nothing is re-imported per configuration.
+
+def cmd_run(args):
+    from litho import cache, experiments, fft, report, telemetry
+
+    cache.configure(enabled=not args.no_cache, cache_dir=args.cache_dir)
+    fft.set_backend(args.fft, args.fft_workers)
+    report.configure(mode="off" if args.no_plots else args.plots)
+    overrides = [config.parse_override(text) for text in args.set]
+    specs = config.load(args.specs, overrides)
+
+    if args.dry_run:
+        for spec in specs:
+            print(spec["name"])
+        return 0
+
+    for i, spec in enumerate(specs, 1):
+        telemetry.reset()
+        stats = copy.deepcopy(cache.STATS)
+        out_dir = experiments.output_dir(spec, args.out)
+        start = time.perf_counter()
+        with telemetry.profile(args.profile, out_dir):
+            run = experiments.run_experiment(spec)
+            experiments.write_outputs(run, args.out)
+        if report.MODE == "defer":
+            report.flush(out_dir)
+        elapsed = time.perf_counter() - start
+        telemetry.write(out_dir, name=spec["name"], seconds=elapsed, cache=cache.stats_since(stats))
+        print(f"[{i}/{len(specs)}] {spec['name']}: {elapsed:.2f}s -> {out_dir}")
+        if args.verbose:
+            print(telemetry.summary())
+    if cache.STATS:
+        print(cache.report())
+    report.flush()
+    return 0
+
+def cmd_report(args):
+    from litho import report
+
+    for directory in args.dirs:
+        count = report.render_saved(directory)
+        print(f"{directory}: {count} figures")
+    return 0
+
+def cmd_replay(args):
+    from litho import cache, experiments
+
+    cache.configure(enabled=False)
+    overrides = [config.parse_override(text) for text in args.set]
+    for spec in config.load(args.specs, overrides):
+        # --set pins the point; the remaining fields are the spec's own values
+        outputs = experiments.replay_trials(spec, args.trial)
+        for i, trial in enumerate(args.trial):
+            values = ", ".join(f"{key}={value[i]}" for key, value in outputs.items())
+            print(f"{spec['name']} trial {trial}: {values}")
+    return 0
+
+def cmd_list(args):
+    from litho import experiments, masks
+
+    print("patterns:", ", ".join(sorted(masks.PATTERNS)))
+    print("metrics: ", ", ".join(sorted(experiments.METRICS)))
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="litho", description="Lithography experiment driver")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run experiment specs (JSON / TOML / YAML)")
+    run.add_argument("specs", nargs="+")
+    run.add_argument("--set", action="append", default=[], metavar="PATH=VALUE",
+                     help="override a spec value in every experiment, e.g. optics.pupil_radius=45")
+    run.add_argument("--out", help="output root (default: each spec's outputs.dir)")
+    run.add_argument("--cache-dir", help="stage cache root (default: $LITHO_CACHE or ~/.cache/litho)")
+    run.add_argument("--no-cache", action="store_true", help="neither read nor write the on-disk stage cache")
+    run.add_argument("--plots", choices=["async", "sync", "defer", "off"], default=None,
+                     help="figure rendering: background pool (default), inline, "
+                          "stored for `litho report`, or none")
+    run.add_argument("--no-plots", action="store_true", help="same as --plots off")
+    run.add_argument("--fft", choices=["auto", "numpy", "scipy", "pyfftw"], default=None,
+                     help="FFT backend (default: $LITHO_FFT or auto)")
+    run.add_argument("--fft-workers", type=int, default=None,
+                     help="FFT threads; -1 = all cores (default)")
+    run.add_argument("--profile", choices=["cprofile", "tracemalloc"],
+                     help="capture a profile of each experiment into its telemetry.json")
+    run.add_argument("-v", "--verbose", action="store_true", help="print per-stage timings")
+    run.add_argument("--dry-run", action="store_true", help="only list the expanded experiments")
+    run.set_defaults(func=cmd_run)
+
+    rep = sub.add_parser("report", help="render figures stored by `run --plots defer`")
+    rep.add_argument("dirs", nargs="+")
+    rep.set_defaults(func=cmd_report)
+
+    rpl = sub.add_parser("replay", help="re-run single Monte Carlo trials of one seeded sweep point")
+    rpl.add_argument("specs", nargs="+")
+    rpl.add_argument("--set", action="append", default=[], metavar="PATH=VALUE",
+                     help="the point's sweep values, e.g. dose=0.9")
+    rpl.add_argument("--trial", action="append", type=int, required=True, help="trial id (repeatable)")
+    rpl.set_defaults(func=cmd_replay)
+
+    lst = sub.add_parser("list", help="list available patterns and metrics")
+    lst.set_defaults(func=cmd_list)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import copy
+import json
+import os
+
+import numpy as np
+
+from litho.resist import RESIST
+
+# ============================================================
+# Experiment specs
+# ============================================================
+# An experiment is a nested dict (JSON / TOML / YAML on disk):
+#
+#   name      output sub-directory and label
+#   pattern   {"name": <litho.masks.PATTERNS key>, "nx": 512, "args": {...}}
+#   optics    {"pupil_radius": 60, "focus_sigma": 0.0, "method": "auto",
+#              "normalize": false}
+#             "tol" truncates the PSF of the sparse / rects methods
+#             (default litho.sparse.DEFAULT_TOL; auto is exact unless set)
+#             "method": "socs" | "abbe" images with partial coherence
+#             from "source" (litho.source dict, default conventional
+#             sigma 0.7), "source_step", "socs_tol" and "defocus" (waves)
+#             "method": "bandlimited" images incoherently on the coarse
+#             Nyquist grid (litho.bandlimit); like socs / abbe it is
+#             periodic, where fft / sparse / rects zero-pad the field
+#   resist    Dill/Mack parameters, see litho.resist.RESIST
+#   dose      nominal dose
+#   sweep     {"<dotted.path>": [values] | {"linspace": [a, b, n]}, ...}
+#             Cartesian grid; e.g. "dose", "optics.focus_sigma",
+#             "pattern.args.pitch", "resist.n"
+#   sampling  {"method": "grid"}, {"method": "lhs", "samples": 64,
+#              "seed": 0} or {"method": "adaptive", ...}; see
+#              litho.sweep and litho.adaptive
+#   metric    {"name": <litho.experiments.METRICS key>, ...params}
+#   mc        {"trials": 40, "photons_per_pixel": 2000, "seed": 0,
+#              "photons_scale_with_dose": false}        (optional)
+#             each trial draws from its own litho.streams stream keyed
+#             by (seed, point, trial id), so trials can be replayed
+#             "model": "acid" (+ "acid": {...}) swaps per-pixel photon
+#             noise for the acid / quencher resist of litho.stochastic
+#             "blur": sigma (pixels) applies a Gaussian resist blur to
+#             the exposure: the mean aerial is blurred and the photon
+#             noise is correlated by the same kernel (litho.noise)
+#   outputs   {"dir": "results", "plots": true}   (see litho.report)
+#
+# A file may hold one experiment, or {"defaults": {...}, "experiments":
+# [...]} and/or {"variants": [{overrides}, ...]} to describe a batch.
+
+DEFAULTS = {
+    "name": "experiment",
+    "pattern": {"name": "two_lines_mask", "nx": 512, "args": {}},
+    "optics": {"pupil_radius": 60, "focus_sigma": 0.0, "method": "auto", "normalize": False},
+    "resist": dict(RESIST),
+    "dose": 1.0,
+    "sweep": {},
+    "sampling": {"method": "grid"},
+    "metric": {"name": "profile_epe"},
+    "mc": None,
+    "outputs": {"dir": "results", "plots": True},
+}
+
+def load_file(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path) as f:
+            return json.load(f)
+    if ext == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f"{path}: YAML specs need PyYAML installed") from None
+        with open(path) as f:
+            return yaml.safe_load(f)
+    raise ValueError(f"{path}: unsupported spec format {ext!r}")
+
+def merge(base, override):
+    """Recursive dict merge; override wins, base is not modified."""
+    out = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(out.get(key), dict):
+            out[key] = merge(out[key], value)
+        else:
+            out[key] = copy.deepcopy(value)
+    return out
+
+def get_path(spec, path):
+    for key in path.split("."):
+        spec = spec[key]
+    return spec
+
+def set_path(spec, path, value):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        spec = spec.setdefault(key, {})
+        if not isinstance(spec, dict):
+            raise ValueError(f"cannot set {path!r}: {key!r} is {spec!r}")
+    spec[keys[-1]] = value
+
+def parse_override(text):
+    """"optics.pupil_radius=45" -> ("optics.pupil_radius", 45); values parse as JSON."""
+    path, _, raw = text.partition("=")
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        value = raw
+    return path.strip(), value
+
+def axis_values(axis):
+    if isinstance(axis, dict):
+        if "linspace" in axis:
+            a, b, n = axis["linspace"]
+            return np.linspace(a, b, int(n))
+        if "arange" in axis:
+            return np.arange(*axis["arange"])
+        raise ValueError(f"unknown sweep axis form: {axis!r}")
+    return np.asarray(axis)
+
+def expand(raw, overrides=()):
+    """All fully-populated experiments described by one spec file."""
+    defaults = merge(DEFAULTS, raw.get("defaults"))
+    experiments = raw.get("experiments")
+    if experiments is None:
+        body = {k: v for k, v in raw.items() if k not in ("defaults", "variants")}
+        experiments = [body]
+
+    out = []
+    for experiment in experiments:
+        base = merge(defaults, experiment)
+        for i, variant in enumerate(raw.get("variants") or [None]):
+            spec = merge(base, variant)
+            if variant is not None and "name" not in variant:
+                spec["name"] = f"{base['name']}_v{i}"
+            for path, value in overrides:
+                set_path(spec, path, value)
+            out.append(spec)
+    return out
+
+def load(paths, overrides=()):
+    specs = []
+    for path in paths:
+        specs.extend(expand(load_file(path), overrides))
+    return specs
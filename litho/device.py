@@ -0,0 +1,118 @@
+import numpy as np
+
+from litho import metrology, resist, streams, telemetry
+
+# ============================================================
+# Device variability from printed gates (day21)
+# ============================================================
+# A gate is a stack of rows ("slices"); each slice is a narrow
+# transistor whose channel length is the printed width of its row, and
+# the device is those slices in parallel:
+#
+#   Id_i = Id0 (L0 / L_i)^alpha_L           per slice
+#   Vt_i = Vt0 + beta_L (L0 - L_i) / L0
+#   Id   = mean(Id_i)                        parallel currents add
+#   Vt   = -S ln(mean(exp(-Vt_i / S)))       subthreshold-current average
+#
+# The means run over all slices of the gate: a slice that did not print
+# is an open and contributes no current (Id_i = 0, exp(-Vt_i / S) = 0),
+# so missing rows lower Id and raise Vt.  L_i = L0 + nm_per_pixel *
+# (width_i - reference width); the reference defaults to the population
+# mean width, which is what day21 meant by
+# `L_eff_pixels - np.mean(L_eff_pixels)`.
+#
+# Realisations are generated and measured as (devices, rows, cols)
+# stacks, chunk devices at a time.  Only the columns where noise can
+# flip the print are simulated: a pixel whose nominal aerial is more
+# than z Poisson sigmas from the resist threshold keeps its nominal
+# state, so a 12 px gate in a 256 px field costs a ~20 column band.
+
+DEVICE = {
+    "L0": 30.0,                 # nominal channel length (nm)
+    "Id0": 1.0,
+    "alpha_L": 1.5,             # Id sensitivity to L
+    "Vt0": 0.4,
+    "beta_L": 0.8,              # Vt sensitivity to L
+    "nm_per_pixel": 0.5,
+    "S": 0.0385,                # subthreshold slope factor n kT / q (V)
+    "min_rows": 0.8,            # printed fraction of rows below which a device is broken
+}
+
+CHUNK_BYTES = 64e6
+
+def noise_band(aerial, photons, resist_params=None, z=6.0):
+    """Column slice outside of which the print is deterministic at z sigma."""
+    threshold = resist.aerial_threshold(resist_params)
+    sigma = np.sqrt(np.maximum(aerial, threshold) / photons)
+    cols = np.nonzero((np.abs(aerial - threshold) < z * sigma).any(axis=0))[0]
+    if len(cols) == 0:
+        return slice(0, 0)
+    return slice(cols[0], cols[-1] + 1)
+
+def compact_model(widths, reference=None, model=None):
+    """
+    Id, Vt and mean channel length (nm) per device from (devices, rows)
+    printed widths in pixels; NaN rows are slices that did not print.
+    """
+    m = {**DEVICE, **(model or {})}
+    widths = np.asarray(widths, dtype=float)
+    if reference is None:
+        reference = np.nanmean(widths)
+    L = m["L0"] + m["nm_per_pixel"] * (widths - reference)
+    Id = m["Id0"] * (m["L0"] / L)**m["alpha_L"]
+    Vt = m["Vt0"] + m["beta_L"] * (m["L0"] - L) / m["L0"]
+    printed = np.isfinite(widths)
+    rows = printed.sum(axis=-1)
+    valid = rows >= m["min_rows"] * widths.shape[-1]
+    # slices that did not print carry no current but still count
+    slices = widths.shape[-1]
+    Id_dev = np.where(printed, Id, 0.0).sum(axis=-1) / slices
+    boltz = np.where(printed, np.exp(-(Vt - m["Vt0"]) / m["S"]), 0.0).sum(axis=-1)
+    with np.errstate(divide="ignore"):
+        Vt_dev = m["Vt0"] - m["S"] * np.log(boltz / slices)
+    return {
+        "L": np.nanmean(L, axis=-1),
+        "Id": np.where(valid, Id_dev, np.nan),
+        "Vt": np.where(valid, Vt_dev, np.nan),
+        "valid": valid,
+    }
+
+def gate_widths(aerial, photons, n_devices, rng=None, resist_params=None, z=6.0, noise="poisson"):
+    """
+    (n_devices, rows) printed widths of shot-noise realisations of one
+    (normalised, dosed) gate aerial image, as day21's idx[-1] - idx[0].
+    noise="normal" draws Gaussian photon counts, fine for photons >~ 100.
+    rng is a seed / generator or a list of n_devices per-device streams.
+    """
+    rng = streams.as_rng(rng)
+    aerial = np.asarray(aerial, dtype=float)
+    r = {**resist.RESIST, **(resist_params or {})}
+    band = aerial[:, noise_band(aerial, photons, r, z)]
+    expected = band * photons
+    chunk = max(1, int(CHUNK_BYTES // (band.size * 8 * 3)))
+
+    widths = np.empty((n_devices, aerial.shape[0]))
+    for start in range(0, n_devices, chunk):
+        k = min(chunk, n_devices - start)
+        with telemetry.timer("noise"):
+            if noise == "normal":
+                counts = expected + np.sqrt(expected) * streams.batch(
+                    rng, start, k, lambda g, lead: g.standard_normal(lead + band.shape))
+            else:
+                counts = streams.batch(
+                    rng, start, k, lambda g, lead: g.poisson(expected, size=lead + band.shape))
+        with telemetry.timer("resist"):
+            printed = resist.develop(counts / photons, r)
+        with telemetry.timer("edges"):
+            left, right = metrology.row_edges(printed)
+        widths[start:start + k] = right - left
+    telemetry.count("devices", n_devices)
+    return widths
+
+def simulate(aerial, photons, n_devices, rng=None, resist_params=None, model=None,
+             reference=None, z=6.0, noise="poisson"):
+    """Device population from a gate aerial image: widths plus compact_model outputs."""
+    widths = gate_widths(aerial, photons, n_devices, rng, resist_params, z, noise)
+    out = compact_model(widths, reference, model)
+    out["widths"] = widths
+    return out
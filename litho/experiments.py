@@ -0,0 +1,420 @@
+import json
+import os
+
+import numpy as np
+
+from litho import (abbe, adaptive, bandlimit, cache, fft, masks, metrology, noise, optics, report, resist,
+                   stochastic, streams, sweep, tcc, telemetry)
+
+# ============================================================
+# Metrics
+# ============================================================
+# Each metric maps one (possibly noisy) resist context - mask, aerial,
+# clear depth, printed map - to a dict of scalars or arrays.  Monte
+# Carlo samples are reduced with the metric's own reducer when it has
+# one, else to mean and std per output.
+
+def _center_profile(image, params):
+    n = image.shape[0]
+    index = n // 2 + params.get("offset", 0)
+    if params.get("axis", "row") == "col":
+        return image[:, index]
+    return image[index, :]
+
+def profile_epe(ctx, params):
+    """Sub-pixel edge of the clear-depth profile minus a target offset from centre (day7-9)."""
+    profile = _center_profile(ctx["clear"], params)
+    edges = metrology.find_edges_subpixel(profile, ctx["resist"]["resist_thickness"])
+    edge = params.get("edge", 0)
+    target = len(profile) // 2 + params.get("target", 0)
+    epe = edges[edge] - target if len(edges) > edge else np.nan
+    cd = edges[edge + 1] - edges[edge] if len(edges) > edge + 1 else np.nan
+    return {"epe": epe, "cd": cd}
+
+def roi_worst_epe(ctx, params):
+    """Worst |EPE| of the distance-field map in a central ROI (day11-14)."""
+    epe_map = metrology.distance_epe(ctx["mask"], ctx["printed"])
+    return {"worst_epe": metrology.worst_epe(epe_map, params.get("roi", 80))}
+
+def hole_open(ctx, params):
+    return {"open": float(metrology.hole_open(ctx["printed"]))}
+
+def line_failure(ctx, params):
+    outcome = metrology.line_failure(
+        ctx["printed"], params.get("expected", 2), params.get("connectivity", 1)
+    )
+    return {"open": float(outcome == "open"), "short": float(outcome == "short")}
+
+def line_width(ctx, params):
+    idx = np.nonzero(_center_profile(ctx["printed"], params))[0]
+    return {"width": float(idx[-1] - idx[0]) if len(idx) else np.nan}
+
+def row_edges(ctx, params):
+    """
+    Printed edges of every row: the outermost ones, or with "line": k
+    those of the k-th drawn line (left to right, mask centre row).
+    """
+    if "line" not in params:
+        left, right = metrology.row_edges(ctx["printed"])
+        return {"left": left, "right": right}
+    drawn = np.zeros(ctx["mask"].shape[1] + 2, dtype=bool)
+    drawn[1:-1] = ctx["mask"][ctx["mask"].shape[0] // 2] > 0.5
+    step = np.diff(drawn.astype(int))
+    start, stop = np.nonzero(step == 1)[0], np.nonzero(step == -1)[0]
+    column = (start[params["line"]] + stop[params["line"]] - 1) // 2
+    left, right = metrology.run_edges(ctx["printed"], column)
+    return {"left": left, "right": right}
+
+def reduce_roughness(samples):
+    """LER / LWR across trials (day19)."""
+    left = np.stack(samples["left"])
+    right = np.stack(samples["right"])
+    width = right - left
+    return {
+        "ler_left": np.nanmean(np.nanstd(left, axis=0)),
+        "ler_right": np.nanmean(np.nanstd(right, axis=0)),
+        "lwr": np.nanmean(np.nanstd(width, axis=0)),
+        "mean_width": np.nanmean(width),
+    }
+
+# telemetry stage each metric's time is booked under
+METRIC_STAGE = {
+    "profile_epe": "edges",
+    "roi_worst_epe": "epe",
+    "hole_open": "failure",
+    "line_failure": "failure",
+    "line_width": "edges",
+    "row_edges": "edges",
+}
+
+METRICS = {
+    "profile_epe": (profile_epe, None),
+    "roi_worst_epe": (roi_worst_epe, None),
+    "hole_open": (hole_open, None),
+    "line_failure": (line_failure, None),
+    "line_width": (line_width, None),
+    "row_edges": (row_edges, reduce_roughness),
+}
+
+def reduce_mean_std(samples):
+    out = {}
+    for key, values in samples.items():
+        values = np.asarray(values, dtype=float)
+        out[key] = np.nanmean(values)
+        out[f"{key}_std"] = np.nanstd(values)
+    return out
+
+# ============================================================
+# Pipeline
+# ============================================================
+# Stages are fetched through litho.cache, keyed by their inputs:
+#
+#   mask, psf -> aerial (unit dose) -> resist (dose, clear depth) -> metric
+#
+# Keys chain, so any stage found in memory or on disk skips everything
+# upstream of it.  Masks, PSFs and clear-depth maps are cheap or large
+# and stay in memory; aerial images and metric values also go to disk.
+
+def build_mask(pattern):
+    return cache.stage(
+        "mask", pattern,
+        lambda: masks.PATTERNS[pattern["name"]](pattern["nx"], **pattern.get("args", {})),
+        disk=False,
+    )
+
+def _psf_inputs(spec):
+    o = spec["optics"]
+    return [spec["pattern"]["nx"], o["pupil_radius"], o.get("focus_sigma", 0.0)]
+
+PARTIAL = ("socs", "abbe")      # partially coherent optics methods
+SOURCE = {"shape": "conventional", "sigma": 0.7}
+
+def _aerial_inputs(spec):
+    inputs = {
+        "pattern": spec["pattern"],
+        "psf": cache.key("psf", _psf_inputs(spec)),
+        "method": spec["optics"].get("method", "auto"),
+        "tol": spec["optics"].get("tol"),
+    }
+    if inputs["method"] in PARTIAL:
+        o = spec["optics"]
+        inputs.update(source=o.get("source", SOURCE), source_step=o.get("source_step", 0.1),
+                      socs_tol=o.get("socs_tol", 0.05), defocus=o.get("defocus", 0.0))
+    return inputs
+
+def _resist_inputs(spec):
+    return {
+        "aerial": cache.key("aerial", _aerial_inputs(spec)),
+        "dose": spec["dose"],
+        "normalize": bool(spec["optics"].get("normalize")),
+        "resist": {**resist.RESIST, **spec["resist"]},
+    }
+
+def build_psf(spec):
+    inputs = _psf_inputs(spec)
+    def compute():
+        with telemetry.timer("psf"):
+            return optics.make_psf(*inputs)
+    return cache.stage("psf", inputs, compute, disk=False)
+
+def partial_aerial(mask, psf, spec):
+    """
+    Hopkins (SOCS) or Abbe image of mask for the spec's source, in the
+    units of the incoherent path: scaled to the open-frame level of psf,
+    so switching optics.method keeps doses and resist thresholds
+    meaningful.  focus_sigma blurs the image as the incoherent defocus
+    model blurs the PSF (periodically, like the spectral engines);
+    optics.defocus is the physical pupil phase (waves at the edge).
+    """
+    o = spec["optics"]
+    inputs = _aerial_inputs(spec)
+    if inputs["method"] == "socs":
+        socs = tcc.socs_kernels(o["pupil_radius"], inputs["source"], inputs["source_step"],
+                                inputs["socs_tol"], inputs["defocus"])
+        # the image is band-limited: kernels run on the coarse Nyquist grid
+        aerial = bandlimit.upsample(bandlimit.socs_bandlimited(mask, socs))
+    else:
+        aerial = abbe.abbe_aerial(mask, o["pupil_radius"], inputs["source"],
+                                  step=inputs["source_step"], defocus=inputs["defocus"])
+    if o.get("focus_sigma", 0.0) > 0:
+        from scipy.ndimage import gaussian_filter
+        aerial = gaussian_filter(aerial, o["focus_sigma"], mode="wrap")
+    return aerial * optics.psf_kernel(psf).sum()
+
+def build_aerial(spec):
+    """Dosed aerial image; the unit-dose image is shared across dose and resist points."""
+    def compute():
+        mask = build_mask(spec["pattern"])
+        psf = build_psf(spec)
+        method = spec["optics"].get("method", "auto")
+        with telemetry.timer("imaging"):
+            if method in PARTIAL:
+                return partial_aerial(mask, psf, spec)
+            if method == "bandlimited":
+                # exact periodic image from the coarse Nyquist grid
+                b = bandlimit.bandlimited_aerial(mask, psf, spec["optics"]["pupil_radius"])
+                return bandlimit.upsample(b)
+            return optics.aerial_image(mask, psf, method=method, tol=spec["optics"].get("tol"))
+
+    aerial = cache.stage("aerial", _aerial_inputs(spec), compute) * spec["dose"]
+    if spec["optics"].get("normalize"):
+        aerial = aerial / aerial.max()
+    return aerial
+
+PREFETCH = 64                   # sweep points looked ahead for batched imaging
+
+def prefetch_aerials(points):
+    """
+    Image the uncached aerials of a run of sweep points together, one
+    optics.aerial_batch call per shared PSF and method, so pattern and
+    pitch libraries are imaged at batched-FFT rather than loop speed.
+    """
+    groups = {}
+    for _, point in points:
+        inputs = _aerial_inputs(point)
+        if inputs["method"] not in ("fft", "auto") or cache.contains("aerial", inputs):
+            continue
+        group = groups.setdefault((inputs["psf"], inputs["method"], inputs["tol"]), {})
+        group[cache.key("aerial", inputs)] = point
+
+    for (_, method, tol), group in groups.items():
+        if len(group) < 2:
+            continue
+        specs = list(group.values())
+        stack = np.stack([build_mask(spec["pattern"]) for spec in specs])
+        psf = build_psf(specs[0])
+        with telemetry.timer("imaging"):
+            images = optics.aerial_batch(stack, psf, method=method, tol=tol)
+        telemetry.count("batched_images", len(specs))
+        for spec, image in zip(specs, images):
+            cache.stage("aerial", _aerial_inputs(spec), lambda image=image: image)
+
+def build_clear(spec):
+    inputs = _resist_inputs(spec)
+    def compute():
+        aerial = build_aerial(spec)
+        with telemetry.timer("resist"):
+            return resist.clear_depth(aerial, inputs["resist"])
+    return cache.stage("resist", inputs, compute, disk=False)
+
+def resist_context(mask, aerial, r, clear=None):
+    if clear is None:
+        with telemetry.timer("resist"):
+            clear = resist.clear_depth(aerial, r)
+    return {"mask": mask, "aerial": aerial, "resist": r, "clear": clear,
+            "printed": clear > r["resist_thickness"]}
+
+def _evaluate(evaluate, ctx, params, stage):
+    with telemetry.timer(stage):
+        return evaluate(ctx, params)
+
+def _site(spec):
+    """
+    Stream site id of a point: its resist image and noise model, but not
+    the trial count, seed or metric - so extra trials extend a run and
+    every metric of a point sees the same realisations.
+    """
+    mc = {k: v for k, v in spec["mc"].items() if k not in ("trials", "seed")}
+    return int(cache.key("site", {"resist": cache.key("resist", _resist_inputs(spec)), "mc": mc}), 16)
+
+def _mc_samples(spec, evaluate, params, seed, trials, stage):
+    """Metric outputs per trial id in trials, each trial from its own stream."""
+    mc = spec["mc"]
+    photons = mc["photons_per_pixel"]
+    if mc.get("photons_scale_with_dose"):
+        photons *= spec["dose"]
+
+    rngs = streams.trial_streams(seed, _site(spec), trials)
+    mask = build_mask(spec["pattern"])
+    aerial = build_aerial(spec)
+    r = {**resist.RESIST, **spec["resist"]}
+    samples = {}
+    def add(ctx):
+        for key, value in _evaluate(evaluate, ctx, params, stage).items():
+            samples.setdefault(key, []).append(value)
+
+    if mc.get("model", "shot") == "acid":
+        # photon / acid / quencher resist: the noise enters through the clear depth
+        for chunk in stochastic.trials(aerial, len(rngs), photons, rngs, mc.get("acid"), r):
+            for clear in chunk["clear"]:
+                add(resist_context(mask, aerial, r, clear))
+        return samples
+
+    telemetry.count("trials", len(rngs))
+    if mc.get("blur"):
+        # resist blur of the exposed image: the blur kernel applied to the
+        # mean aerial, plus Gaussian photon noise correlated by the same
+        # kernel (local std), drawn in batches from one precomputed filter
+        filt = noise.make_filter(aerial.shape, sigma=mc["blur"], normalize=False)
+        std = np.sqrt(aerial / photons)
+        with telemetry.timer("noise"):
+            blurred = fft.convolve_same(aerial, filt["kernel"])
+        chunk = max(1, int(noise.CHUNK_BYTES // (aerial.size * 8 * 4)))
+        for start in range(0, len(rngs), chunk):
+            for field in noise.sample(filt, len(rngs[start:start + chunk]), rngs[start:start + chunk]):
+                add(resist_context(mask, blurred + std * field, r))
+        return samples
+
+    for rng in rngs:
+        with telemetry.timer("noise"):
+            noisy = rng.poisson(aerial * photons) / photons
+        add(resist_context(mask, noisy, r))
+    return samples
+
+def _monte_carlo(spec, evaluate, reducer, params, seed, stage):
+    samples = _mc_samples(spec, evaluate, params, seed, spec["mc"]["trials"], stage)
+    return (reducer or reduce_mean_std)(samples)
+
+def _metric(spec):
+    params = dict(spec["metric"])
+    name = params.pop("name")
+    evaluate, reducer = METRICS[name]
+    return evaluate, reducer, params, METRIC_STAGE.get(name, "metric")
+
+def evaluate_point(spec):
+    """Metric outputs for one fully specified sweep point."""
+    evaluate, reducer, params, stage = _metric(spec)
+    telemetry.count("points")
+    inputs = {"resist": cache.key("resist", _resist_inputs(spec)), "metric": spec["metric"],
+              "mc": spec.get("mc")}
+
+    mc = spec.get("mc")
+    if mc:
+        if mc.get("seed") is None:
+            # unseeded noise is not reproducible, so never cache it
+            return _monte_carlo(spec, evaluate, reducer, params, streams.new_seed(), stage)
+        # per-trial streams of the point's own site: independent of sweep
+        # order, of the grid around it and of how trials are batched
+        return cache.stage("metric", inputs,
+                           lambda: _monte_carlo(spec, evaluate, reducer, params, mc["seed"], stage))
+
+    def compute():
+        r = {**resist.RESIST, **spec["resist"]}
+        ctx = resist_context(build_mask(spec["pattern"]), build_aerial(spec), r, build_clear(spec))
+        return _evaluate(evaluate, ctx, params, stage)
+    return cache.stage("metric", inputs, compute)
+
+def replay_trials(spec, trials):
+    """
+    Unreduced metric outputs {key: [value per trial]} of the given trial
+    ids of one seeded MC point (see sweep.point_spec), e.g. to inspect a
+    single failing trial without rerunning the batch.
+    """
+    if (spec.get("mc") or {}).get("seed") is None:
+        raise ValueError("only seeded Monte Carlo points can be replayed")
+    evaluate, _, params, stage = _metric(spec)
+    return _mc_samples(spec, evaluate, params, spec["mc"]["seed"], trials, stage)
+
+def evaluate_points(points):
+    """evaluate_point over a list of (index, point spec), with batched aerial prefetch."""
+    outputs = []
+    for i, (_, point) in enumerate(points):
+        if i % PREFETCH == 0:
+            prefetch_aerials(points[i:i + PREFETCH])
+        outputs.append(evaluate_point(point))
+    return outputs
+
+def run_experiment(spec):
+    if (spec.get("sampling") or {}).get("method") == "adaptive":
+        axes, _, results = adaptive.run(spec, evaluate_points)
+        return {"spec": spec, "axes": axes, "results": results}
+
+    axes, shape, points = sweep.schedule(spec)
+
+    results = {}
+    for (index, _), outputs in zip(points, evaluate_points(points)):
+        for key, value in outputs.items():
+            if key not in results:
+                results[key] = np.full(shape, np.nan)
+            results[key][index] = value
+
+    return {"spec": spec, "axes": axes, "results": results}
+
+# ============================================================
+# Outputs
+# ============================================================
+def output_dir(spec, out_root=None):
+    return os.path.join(out_root or spec["outputs"]["dir"], spec["name"])
+
+def write_outputs(run, out_root=None):
+    with telemetry.timer("io"):
+        return _write_outputs(run, output_dir(run["spec"], out_root))
+
+def _write_outputs(run, out_dir):
+    spec = run["spec"]
+    os.makedirs(out_dir, exist_ok=True)
+
+    arrays = {f"axis:{k}": v for k, v in run["axes"].items()}
+    arrays.update(run["results"])
+    np.savez(os.path.join(out_dir, "result.npz"), **arrays)
+
+    summary = {
+        "spec": spec,
+        "axes": {k: v.tolist() for k, v in run["axes"].items()},
+        "results": {k: np.asarray(v).tolist() for k, v in run["results"].items()},
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=1, default=float)
+
+    if spec["outputs"].get("plots", True):
+        with telemetry.timer("plots"):
+            submit_plots(run, out_dir)
+    return out_dir
+
+def submit_plots(run, out_dir):
+    """Queue a heatmap (2-axis grid) or line plot (1 axis) per result, PNG and HTML."""
+    axes = run["axes"]
+    names = list(axes)
+    grid = (run["spec"].get("sampling") or {}).get("method", "grid") in ("grid", "adaptive")
+    for key, values in run["results"].items():
+        values = np.asarray(values)
+        title = f"{run['spec']['name']}: {key}"
+        for ext in ("png", "html"):
+            path = os.path.join(out_dir, f"{key}.{ext}")
+            if grid and values.ndim == 2:
+                report.submit("heatmap", path, z=values, x=axes[names[1]], y=axes[names[0]],
+                              xlabel=names[1], ylabel=names[0], zlabel=key, title=title)
+            elif values.ndim == 1 and len(names) == 1:
+                order = np.argsort(axes[names[0]])
+                report.submit("lines", path, x=axes[names[0]][order], ys=[values[order]],
+                              xlabel=names[0], ylabel=key, title=title, marker="o")
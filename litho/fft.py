@@ -0,0 +1,194 @@
+import atexit
+import os
+import pickle
+
+import numpy as np
+
+from litho import cache
+
+# ============================================================
+# FFT backends
+# ============================================================
+# All imaging FFTs go through this module, so the library is picked at
+# run time (LITHO_FFT or set_backend):
+#
+#   "numpy"   numpy.fft; single-threaded, no planning
+#   "scipy"   scipy.fft with workers=WORKERS (default: all cores)
+#   "pyfftw"  FFTW plans built once per (transform, shape, dtype) and
+#             reused, threads=WORKERS, wisdom kept in the stage cache
+#             directory (cache.CACHE_DIR at load / save time)
+#   "auto"    scipy when importable, else numpy (default)
+#
+# The functions mirror scipy.fft (s=, axes=, workers=, overwrite_x=) and
+# transform the last two axes, so stacks of masks are batched for free.
+# The backend library is imported on first use, not with the package.
+
+BACKEND = os.environ.get("LITHO_FFT", "auto")
+WORKERS = int(os.environ.get("LITHO_FFT_WORKERS", -1))
+PLANNER_EFFORT = "FFTW_MEASURE"
+WISDOM_NAME = "fftw_wisdom.pkl"
+
+_ACTIVE = None
+_PLANS = {}
+
+def set_backend(name=None, workers=None):
+    global BACKEND, WORKERS, _ACTIVE
+    if name is not None:
+        if name not in ("auto", "numpy", "scipy", "pyfftw"):
+            raise ValueError(f"unknown FFT backend {name!r}")
+        BACKEND = name
+        _ACTIVE = None
+        _PLANS.clear()
+    if workers is not None:
+        WORKERS = workers
+
+def backend():
+    """Name of the library in use, resolving "auto" (and importing it) on first call."""
+    global _ACTIVE
+    if _ACTIVE is None:
+        name = BACKEND
+        if name == "auto":
+            try:
+                import scipy.fft  # noqa: F401
+                name = "scipy"
+            except ImportError:
+                name = "numpy"
+        elif name == "pyfftw":
+            _load_wisdom()
+        _ACTIVE = name
+    return _ACTIVE
+
+def threads(workers=None):
+    """Thread count a transform will use."""
+    workers = WORKERS if workers is None else workers
+    if workers < 0:
+        return os.cpu_count() or 1
+    return workers
+
+# ============================================================
+# pyFFTW plans and wisdom
+# ============================================================
+def wisdom_file():
+    """Wisdom path under the current cache directory, or None with the disk cache off."""
+    if not cache.ENABLED:
+        return None
+    return os.path.join(cache.CACHE_DIR, WISDOM_NAME)
+
+def _load_wisdom():
+    import pyfftw
+
+    path = wisdom_file()
+    if path is not None and os.path.exists(path):
+        with open(path, "rb") as f:
+            pyfftw.import_wisdom(pickle.load(f))
+    atexit.register(_save_wisdom)
+
+def _save_wisdom():
+    import pyfftw
+
+    path = wisdom_file()
+    if path is None:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(pyfftw.export_wisdom(), f)
+
+def _fftw(kind, x, s, axes, workers):
+    import pyfftw.builders
+
+    n_threads = threads(workers)
+    key = (kind, x.shape, x.dtype.str, s, axes, n_threads)
+    plan = _PLANS.get(key)
+    if plan is None:
+        build = getattr(pyfftw.builders, kind)
+        plan = build(x, s=s, axes=axes, threads=n_threads, planner_effort=PLANNER_EFFORT)
+        _PLANS[key] = plan
+    # the plan owns its output buffer, which the next call overwrites
+    return plan(x).copy()
+
+# ============================================================
+# Transforms
+# ============================================================
+def _call(kind, x, s, axes, workers, overwrite_x):
+    name = backend()
+    if name == "pyfftw":
+        return _fftw(kind, np.asarray(x), None if s is None else tuple(s), tuple(axes), workers)
+    if name == "scipy":
+        import scipy.fft
+
+        return getattr(scipy.fft, kind)(x, s=s, axes=axes, overwrite_x=overwrite_x,
+                                        workers=WORKERS if workers is None else workers)
+    return getattr(np.fft, kind)(x, s=s, axes=axes)
+
+def fft2(x, s=None, axes=(-2, -1), workers=None, overwrite_x=False):
+    return _call("fft2", x, s, axes, workers, overwrite_x)
+
+def ifft2(x, s=None, axes=(-2, -1), workers=None, overwrite_x=False):
+    return _call("ifft2", x, s, axes, workers, overwrite_x)
+
+def rfft2(x, s=None, axes=(-2, -1), workers=None, overwrite_x=False):
+    return _call("rfft2", x, s, axes, workers, overwrite_x)
+
+def irfft2(x, s=None, axes=(-2, -1), workers=None, overwrite_x=False):
+    return _call("irfft2", x, s, axes, workers, overwrite_x)
+
+def fft(x, axis=-1, workers=None):
+    return _call("fftn", x, None, (axis,), workers, False)
+
+def ifft(x, axis=-1, workers=None):
+    return _call("ifftn", x, None, (axis,), workers, False)
+
+def next_fast_len(n):
+    """Smallest 2^a 3^b 5^c >= n (sizes every backend transforms quickly)."""
+    best = 1 << max(0, int(n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            m = p35
+            while m < n:
+                m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+# ============================================================
+# Linear convolution with cached kernel spectra
+# ============================================================
+_OTF_CACHE = {}
+OTF_CACHE_SIZE = 16
+
+def kernel_spectrum(kernel, shape):
+    """
+    rfft2 of kernel zero-padded to shape, cached per kernel array (or
+    view) and shape.  Kernels are treated as read-only, like the PSFs of
+    optics.make_psf.
+    """
+    owner = kernel if kernel.base is None else kernel.base
+    key = (id(owner), kernel.__array_interface__["data"][0], kernel.shape, kernel.strides, tuple(shape))
+    cached = _OTF_CACHE.get(key)
+    if cached is not None and cached[0] is owner:
+        return cached[1]
+    if len(_OTF_CACHE) >= OTF_CACHE_SIZE:
+        _OTF_CACHE.clear()
+    otf = rfft2(kernel, s=shape)
+    _OTF_CACHE[key] = (owner, otf)
+    return otf
+
+def fast_shape(image_shape, kernel_shape):
+    return tuple(next_fast_len(n + k - 1) for n, k in zip(image_shape, kernel_shape))
+
+def convolve_same(image, kernel):
+    """
+    Linear convolution cropped to image's (trailing) shape, as
+    scipy.signal.fftconvolve(mode="same"); image may be a (K, ny, nx) stack.
+    """
+    ny, nx = image.shape[-2:]
+    ky, kx = kernel.shape
+    shape = fast_shape((ny, nx), (ky, kx))
+    spectrum = rfft2(image, s=shape)
+    spectrum *= kernel_spectrum(kernel, shape)
+    full = irfft2(spectrum, s=shape, overwrite_x=True)
+    y0, x0 = (ky - 1) // 2, (kx - 1) // 2
+    return full[..., y0:y0 + ny, x0:x0 + nx]
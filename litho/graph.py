@@ -0,0 +1,192 @@
+import os
+import time
+
+import numpy as np
+
+from litho import metrology, optics, resist
+
+# ============================================================
+# Lazy stage graph
+# ============================================================
+# A graph is a dict of nodes, each a function with named inputs:
+#
+#   g = new_graph(memory_budget=256e6, spill_dir="/tmp/litho_spill")
+#   add(g, "aerial", optics.aerial_image, ["mask", "psf"])
+#   get(g, "aerial", "printed")
+#
+# get() computes only the requested nodes and their ancestors and
+# memoizes every value.  Whenever the resident values exceed
+# memory_budget bytes, the least recently used intermediates leave
+# memory: spilled to spill_dir as .npy when there is one, else dropped
+# and recomputed on demand.  Requested nodes, the inputs of a node
+# being computed and pinned nodes (inputs, keep=True) are never evicted.
+#
+# g["stats"][name] records calls, seconds spent, result bytes, and how
+# often the node was loaded back from disk; g["peak"] is the largest
+# resident size seen.
+
+def new_graph(memory_budget=None, spill_dir=None):
+    return {
+        "nodes": {},
+        "values": {},
+        "spilled": {},
+        "used": {},
+        "stats": {},
+        "clock": 0,
+        "peak": 0,
+        "memory_budget": memory_budget,
+        "spill_dir": spill_dir,
+    }
+
+def add(graph, name, fn, inputs=(), keep=False):
+    graph["nodes"][name] = {"fn": fn, "inputs": list(inputs), "keep": keep}
+    invalidate(graph, name)
+
+def set_input(graph, name, value):
+    """A constant source node; replacing it invalidates everything downstream."""
+    add(graph, name, None, keep=True)
+    graph["values"][name] = value
+
+def downstream(graph, name):
+    out = set()
+    stack = [name]
+    while stack:
+        current = stack.pop()
+        for other, node in graph["nodes"].items():
+            if current in node["inputs"] and other not in out:
+                out.add(other)
+                stack.append(other)
+    return out
+
+def invalidate(graph, name):
+    for stale in {name} | downstream(graph, name):
+        graph["values"].pop(stale, None)
+        path = graph["spilled"].pop(stale, None)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+def nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(nbytes(v) for v in value)
+    return 0
+
+def resident_bytes(graph):
+    return sum(nbytes(v) for v in graph["values"].values())
+
+# ============================================================
+# Evaluation
+# ============================================================
+def _stats(graph, name):
+    return graph["stats"].setdefault(
+        name, {"calls": 0, "seconds": 0.0, "bytes": 0, "loads": 0}
+    )
+
+def _value(graph, name, protected):
+    graph["clock"] += 1
+    graph["used"][name] = graph["clock"]
+    values = graph["values"]
+    if name in values:
+        return values[name]
+
+    if name in graph["spilled"]:
+        path = graph["spilled"].pop(name)
+        value = np.load(path)
+        os.remove(path)
+        _stats(graph, name)["loads"] += 1
+        values[name] = value
+        graph["peak"] = max(graph["peak"], resident_bytes(graph))
+        _evict(graph, protected | {name})
+        return value
+
+    node = graph["nodes"][name]
+    if node["fn"] is None:
+        raise KeyError(f"input {name!r} has no value")
+    # fetched inputs stay resident until the node has been computed
+    pinned = protected | {name} | set(node["inputs"])
+    args = [_value(graph, dep, pinned) for dep in node["inputs"]]
+
+    start = time.perf_counter()
+    value = node["fn"](*args)
+    del args
+    s = _stats(graph, name)
+    s["calls"] += 1
+    s["seconds"] += time.perf_counter() - start
+    s["bytes"] = nbytes(value)
+    values[name] = value
+    graph["peak"] = max(graph["peak"], resident_bytes(graph))
+    _evict(graph, protected | {name})
+    return value
+
+def _evict(graph, protected):
+    budget = graph["memory_budget"]
+    if budget is None:
+        return
+    values = graph["values"]
+    candidates = [
+        name for name in values
+        if name not in protected and not graph["nodes"][name]["keep"]
+    ]
+    candidates.sort(key=lambda name: graph["used"].get(name, 0))
+
+    resident = resident_bytes(graph)
+    for name in candidates:
+        if resident <= budget:
+            break
+        value = values.pop(name)
+        resident -= nbytes(value)
+        if graph["spill_dir"] is not None and isinstance(value, np.ndarray):
+            os.makedirs(graph["spill_dir"], exist_ok=True)
+            path = os.path.join(graph["spill_dir"], f"{id(graph):x}_{name}.npy")
+            np.save(path, value)
+            graph["spilled"][name] = path
+
+def get(graph, *names):
+    """Values of the requested nodes (a single value for a single name)."""
+    protected = set(names)
+    out = [_value(graph, name, protected) for name in names]
+    return out[0] if len(out) == 1 else out
+
+def report(graph):
+    lines = [f"{'node':>10} {'calls':>5} {'seconds':>8} {'MB':>8} {'loads':>5}"]
+    for name, s in graph["stats"].items():
+        lines.append(f"{name:>10} {s['calls']:>5} {s['seconds']:>8.3f} "
+                     f"{s['bytes'] / 1e6:>8.2f} {s['loads']:>5}")
+    lines.append(f"resident: {resident_bytes(graph) / 1e6:.2f} MB, "
+                 f"peak: {graph['peak'] / 1e6:.2f} MB, spilled: {len(graph['spilled'])} nodes")
+    return "\n".join(lines)
+
+# ============================================================
+# Standard imaging -> resist -> metrology pipeline
+# ============================================================
+def imaging_graph(mask, nx=None, pupil_radius=60, focus_sigma=0.0, dose=1.0,
+                  resist_params=None, roi=100, method="auto", **kwargs):
+    """
+    pupil -> psf -> aerial -> PAC -> rate -> clear -> printed -> EPE -> worst_epe,
+    as in the day11-14 scripts.  Change an input with set_input().
+    """
+    r = {**resist.RESIST, **(resist_params or {})}
+    nx = nx or mask.shape[0]
+
+    g = new_graph(**kwargs)
+    set_input(g, "mask", mask)
+    set_input(g, "dose", dose)
+    set_input(g, "resist", r)
+    set_input(g, "focus_sigma", focus_sigma)
+    set_input(g, "roi", roi)
+
+    add(g, "pupil", lambda: optics.circular_pupil(nx, pupil_radius))
+    add(g, "psf", lambda pupil, fs: optics.defocus_psf(optics.psf_from_pupil(pupil), fs),
+        ["pupil", "focus_sigma"])
+    add(g, "aerial", lambda m, psf, d: optics.aerial_image(m, psf, d, method=method),
+        ["mask", "psf", "dose"])
+    add(g, "PAC", lambda a, r: resist.dill(a, r["C"]), ["aerial", "resist"])
+    add(g, "rate", lambda M, r: resist.mack_rate(M, r["Rmax"], r["M0"], r["n"]), ["PAC", "resist"])
+    add(g, "clear", lambda R, r: R * r["develop_time"], ["rate", "resist"])
+    add(g, "printed", lambda c, r: c > r["resist_thickness"], ["clear", "resist"])
+    add(g, "EPE", metrology.distance_epe, ["mask", "printed"])
+    add(g, "worst_epe", metrology.worst_epe, ["EPE", "roi"])
+    return g
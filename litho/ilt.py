@@ -0,0 +1,148 @@
+import os
+import time
+
+import numpy as np
+
+from litho import fft, optics, resist, telemetry, variance
+
+# ============================================================
+# Inverse lithography (pixel-based mask optimisation)
+# ============================================================
+# The mask is a sigmoid of free parameters theta, imaged incoherently
+# and developed through a differentiable form of the resist chain:
+#
+#   m     = sigmoid(mask_steepness * theta)
+#   I     = dose * m ⊗ K                      (fft.convolve_same)
+#   clear = Mack(Dill(I)) * develop_time      (litho.resist)
+#   P     = sigmoid(resist_steepness * (clear - resist_thickness))
+#   loss  = sum((P - target)^2) + grey * sum(m * (1 - m))
+#           + stochastic * sum(Var(P))          (optional, litho.variance)
+#
+# The gradient is the adjoint of that chain: pointwise derivatives back
+# to dL/dI, one correlation with K (a convolution with the flipped
+# kernel, whose spectrum fft caches like K's) back to dL/dm, and the
+# sigmoid's derivative to theta.  Each iteration therefore costs two
+# FFT convolutions, independent of the number of pixels moved.
+#
+# Updates are Adam (default) or scipy's L-BFGS-B; with a checkpoint
+# path theta is saved every `every` iterations and a later call
+# resumes from it.
+
+MASK_STEEPNESS = 4.0
+RESIST_STEEPNESS = 50.0
+GREY_PENALTY = 0.05
+
+def _sigmoid(x):
+    return 0.5 * (1 + np.tanh(0.5 * x))
+
+def loss_and_grad(theta, target, kernel, r, dose=1.0, mask_steepness=MASK_STEEPNESS,
+                  resist_steepness=RESIST_STEEPNESS, grey=GREY_PENALTY, photons=None, stochastic=0.0):
+    """Loss, dloss/dtheta and the current mask / printed probability."""
+    m = _sigmoid(mask_steepness * theta)
+    with telemetry.timer("imaging"):
+        aerial = dose * fft.convolve_same(m, kernel)
+    with telemetry.timer("resist"):
+        clear, d_clear = resist.clear_depth_grad(aerial, r)
+        P = _sigmoid(resist_steepness * (clear - r["resist_thickness"]))
+        diff = P - target
+        loss = np.sum(diff**2) + grey * np.sum(m * (1 - m))
+        g_aerial = 2 * diff * resist_steepness * P * (1 - P) * d_clear
+        if stochastic:
+            var, d_var = variance.printed_variance(aerial, photons, r, resist_steepness)
+            loss += stochastic * np.sum(var)
+            g_aerial += stochastic * d_var
+    with telemetry.timer("adjoint"):
+        g_mask = dose * fft.convolve_same(g_aerial, kernel[::-1, ::-1])
+    g_mask += grey * (1 - 2 * m)
+    g_theta = g_mask * mask_steepness * m * (1 - m)
+    return loss, g_theta, m, P
+
+# ============================================================
+# Optimisation
+# ============================================================
+def _save(path, theta, iteration, history, **state):
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, theta=theta, iteration=iteration, history=np.asarray(history), **state)
+    os.replace(tmp, path)
+
+def optimize(target, psf, resist_params=None, dose=1.0, iterations=100, method="adam",
+             step=0.1, beta1=0.9, beta2=0.999, tol=1e-6, checkpoint=None, every=10,
+             mask_steepness=MASK_STEEPNESS, resist_steepness=RESIST_STEEPNESS, grey=GREY_PENALTY,
+             photons=None, stochastic=0.0):
+    """
+    Optimise a mask so the printed pattern matches target (0/1 array,
+    e.g. from litho.masks).  Returns a dict with the grey mask, its
+    binarised version, the printed probability, loss history and the
+    seconds per iteration.  With photons and stochastic > 0 the loss
+    also penalises the first-order shot-noise variance of the print.
+    """
+    target = np.asarray(target, dtype=float)
+    r = {**resist.RESIST, **(resist_params or {})}
+    kernel = optics.psf_kernel(psf)
+    args = (target, kernel, r, dose, mask_steepness, resist_steepness, grey, photons, stochastic)
+
+    theta = (2 * target - 1) / mask_steepness
+    start, history, saved = 0, [], {}
+    if checkpoint and os.path.exists(checkpoint):
+        saved = dict(np.load(checkpoint))
+        theta, start, history = saved["theta"], int(saved["iteration"]), saved["history"].tolist()
+
+    t0 = time.perf_counter()
+    if method == "adam":
+        # Adam moments resume with theta; after an L-BFGS checkpoint they restart
+        m1 = saved.get("m1", np.zeros_like(theta))
+        m2 = saved.get("m2", np.zeros_like(theta))
+        offset = 0 if "m1" in saved else start
+        done = start
+        for it in range(start, iterations):
+            loss, grad, _, _ = loss_and_grad(theta, *args)
+            history.append(float(loss))
+            m1 = beta1 * m1 + (1 - beta1) * grad
+            m2 = beta2 * m2 + (1 - beta2) * grad**2
+            n = it - offset + 1
+            theta = theta - step * (m1 / (1 - beta1**n)) / (np.sqrt(m2 / (1 - beta2**n)) + 1e-12)
+            done = it + 1
+            if checkpoint and done % every == 0:
+                _save(checkpoint, theta, done, history, m1=m1, m2=m2)
+            if len(history) > 1 and abs(history[-2] - history[-1]) <= tol * max(history[-2], 1e-30):
+                break
+    elif method == "lbfgs":
+        from scipy.optimize import minimize
+
+        shape = theta.shape
+        state = {"it": start}
+
+        def fun(x):
+            loss, grad, _, _ = loss_and_grad(x.reshape(shape), *args)
+            state["loss"] = float(loss)
+            return loss, grad.ravel()
+
+        def callback(x):
+            # the last evaluation of an L-BFGS-B step is the accepted point
+            state["it"] += 1
+            history.append(state["loss"])
+            if checkpoint and state["it"] % every == 0:
+                _save(checkpoint, x.reshape(shape), state["it"], history)
+
+        res = minimize(fun, theta.ravel(), jac=True, method="L-BFGS-B", callback=callback,
+                       options={"maxiter": max(iterations - start, 0), "ftol": tol})
+        theta = res.x.reshape(shape)
+        done = state["it"]
+    else:
+        raise ValueError(f"unknown ILT method {method!r}")
+    elapsed = time.perf_counter() - t0
+
+    if checkpoint:
+        _save(checkpoint, theta, done, history, **({"m1": m1, "m2": m2} if method == "adam" else {}))
+    loss, _, mask, printed = loss_and_grad(theta, *args)
+    telemetry.count("ilt_iterations", done - start)
+    return {
+        "theta": theta,
+        "mask": mask,
+        "binary": (mask > 0.5).astype(float),
+        "printed": printed,
+        "loss": float(loss),
+        "history": history,
+        "iterations": done,
+        "seconds_per_iteration": elapsed / max(done - start, 1),
+    }
@@ -0,0 +1,111 @@
+import numpy as np
+
+from litho import device, fft, streams, telemetry
+
+# ============================================================
+# Synthetic line-edge roughness from a PSD model
+# ============================================================
+# Edges are drawn directly from the roughness spectrum estimated in
+# day20 instead of from a full aerial / resist Monte Carlo:
+#
+#   S(f) ∝ 1 / (1 + (2 pi f xi)^2)^(H + 1/2)
+#
+# with sigma the edge RMS, xi the correlation length (pixels) and H
+# the roughness exponent.  A batch of white Gaussian rows is filtered
+# by sqrt(S) with one rfft / irfft pair along the rows; the spectrum is
+# normalised so the edges have variance sigma^2 exactly in expectation.
+# Rows are generated `pad` times longer than requested and cropped, so
+# the edges are not periodic.
+#
+# fit_psd() goes the other way: it estimates (sigma, xi, H) from a
+# stack of edges (e.g. sub-pixel row edges of MC prints) by matching
+# log spectra over a (xi, H) grid, refined once around the best cell.
+
+def model_psd(freqs, xi, H):
+    """Unnormalised PSD shape at frequencies in cycles / pixel."""
+    return (1 + (2 * np.pi * np.asarray(freqs) * xi)**2)**(-(H + 0.5))
+
+def _filter(n, xi, H):
+    """sqrt of the rfft-domain PSD, normalised to unit variance."""
+    S = model_psd(np.fft.fftfreq(n), xi, H)
+    return np.sqrt(model_psd(np.fft.rfftfreq(n), xi, H) / S.mean())
+
+def synthetic_edges(n_edges, n_points, sigma, xi, H=0.5, rng=None, pad=2):
+    """
+    (n_edges, n_points) zero-mean rough edges with the model PSD; rng is
+    a seed / generator or a list of n_edges per-edge streams.
+    """
+    rng = streams.as_rng(rng)
+    n = int(pad * n_points)
+    with telemetry.timer("noise"):
+        white = streams.batch(rng, 0, n_edges, lambda g, lead: g.standard_normal(lead + (n,)))
+        edges = fft.irfft2(fft.rfft2(white, axes=(-1,)) * _filter(n, xi, H), s=(n,), axes=(-1,))
+    return sigma * edges[:, :n_points]
+
+def edge_psd(edges):
+    """Mean periodogram of mean-removed edges, normalised so sum / n = variance (day20)."""
+    edges = np.asarray(edges, dtype=float)
+    dev = edges - edges.mean(axis=-1, keepdims=True)
+    n = dev.shape[-1]
+    psd = np.mean(np.abs(np.fft.rfft(dev, axis=-1))**2, axis=0) / n
+    return np.fft.rfftfreq(n), psd
+
+def _misfit(freqs, log_psd, xi, H):
+    model = model_psd(freqs[None, None, :], xi[:, :, None], H[:, :, None])
+    resid = log_psd - np.log(model)
+    # the overall level is fitted analytically: the mean log residual
+    resid -= resid.mean(axis=-1, keepdims=True)
+    return np.sum(resid**2, axis=-1)
+
+def fit_psd(edges, xi_range=None, H_range=(0.05, 1.5), n_grid=40):
+    """
+    (sigma, xi, H) of a stack of edges (n_edges, n_points), rows with
+    NaNs dropped.  sigma is the mean per-edge RMS, corrected for the
+    low-frequency power each edge's own mean absorbs.
+    """
+    edges = np.asarray(edges, dtype=float)
+    edges = edges[np.isfinite(edges).all(axis=1)]
+    n = edges.shape[1]
+    freqs, psd = edge_psd(edges)
+    keep = slice(1, None)                   # the DC bin is removed with the mean
+    freqs, log_psd = freqs[keep], np.log(psd[keep])
+    sigma = np.mean(np.std(edges, axis=1))
+
+    xi_lo, xi_hi = xi_range or (0.25, n / 4)
+    log_xi = np.linspace(np.log(xi_lo), np.log(xi_hi), n_grid)
+    Hs = np.linspace(*H_range, n_grid)
+    for _ in range(2):
+        xi, H = np.meshgrid(np.exp(log_xi), Hs, indexing="ij")
+        i, j = np.unravel_index(np.argmin(_misfit(freqs, log_psd, xi, H)), xi.shape)
+        d_xi, d_H = log_xi[1] - log_xi[0], Hs[1] - Hs[0]
+        log_xi = np.linspace(log_xi[i] - d_xi, log_xi[i] + d_xi, n_grid)
+        Hs = np.linspace(max(Hs[j] - d_H, 0.0), Hs[j] + d_H, n_grid)
+    xi, H = float(xi[i, j]), float(H[i, j])
+    # removing each edge's mean also removes its share of the DC power
+    S = model_psd(np.fft.fftfreq(n), xi, H)
+    sigma /= np.sqrt(1 - S[0] / S.sum())
+    return {"sigma": float(sigma), "xi": xi, "H": H}
+
+# ============================================================
+# Gates for the device model
+# ============================================================
+def synthetic_gates(n_devices, rows, width, sigma, xi, H=0.5, rng=None, correlation=0.0):
+    """
+    Left / right edges and widths of n_devices gates of nominal width
+    (pixels) with model roughness on each edge; correlation is the
+    left-right correlation coefficient (0 = independent, LWR^2 = 2 LER^2).
+    """
+    rng = streams.as_rng(rng)
+    a = synthetic_edges(n_devices, rows, sigma, xi, H, rng)
+    b = synthetic_edges(n_devices, rows, sigma, xi, H, rng)
+    left = -width / 2 + a
+    right = width / 2 + correlation * a + np.sqrt(1 - correlation**2) * b
+    return {"left": left, "right": right, "widths": right - left}
+
+def simulate_devices(n_devices, rows, width, sigma, xi, H=0.5, rng=None, correlation=0.0,
+                     model=None):
+    """Device population from synthetic edges, through device.compact_model."""
+    gates = synthetic_gates(n_devices, rows, width, sigma, xi, H, rng, correlation)
+    out = device.compact_model(gates["widths"], reference=width, model=model)
+    out["widths"] = gates["widths"]
+    return out
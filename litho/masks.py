@@ -0,0 +1,176 @@
+import numpy as np
+
+# ============================================================
+# Rectangles
+# ============================================================
+# Every Manhattan generator below is defined by its rectangles
+# (y0, y1, x0, x1), half-open like the numpy slices in the scripts,
+# so imaging engines can work on the geometry instead of the raster.
+# Rectangle lists are disjoint: overlapping arms are split so that the
+# sum of the rectangles equals the union drawn by rects_to_mask.
+
+def clip_rects(nx, rects):
+    """Clip rectangles to the field and drop the ones left empty."""
+    out = []
+    for y0, y1, x0, x1 in rects:
+        y0, y1 = max(y0, 0), min(y1, nx)
+        x0, x1 = max(x0, 0), min(x1, nx)
+        if y0 < y1 and x0 < x1:
+            out.append((y0, y1, x0, x1))
+    return out
+
+def rects_to_mask(nx, rects):
+    img = np.zeros((nx, nx))
+    for y0, y1, x0, x1 in rects:
+        img[y0:y1, x0:x1] = 1.0
+    return img
+
+def decompose_rects(mask):
+    """
+    Exact rectangle cover of a binary mask: horizontal runs, merged
+    downwards while the run below has the same extent.
+    """
+    ny, nx = mask.shape
+    rects = []
+    open_runs = {}
+    for y in range(ny + 1):
+        row_runs = set()
+        if y < ny:
+            pad = np.zeros(nx + 2, dtype=bool)
+            pad[1:-1] = mask[y] != 0
+            xs = np.nonzero(pad[1:] != pad[:-1])[0]
+            row_runs = set(zip(xs[0::2], xs[1::2]))
+        for run in list(open_runs):
+            if run not in row_runs:
+                x0, x1 = run
+                rects.append((open_runs.pop(run), y, int(x0), int(x1)))
+        for run in row_runs:
+            open_runs.setdefault(run, y)
+    return rects
+
+# ============================================================
+# Line patterns (week1 / week2)
+# ============================================================
+def two_lines_rects(nx, line_width=6, spacing=30):
+    c = nx // 2
+    l = c - spacing // 2
+    r = c + spacing // 2
+    return clip_rects(nx, [
+        (0, nx, l - line_width // 2, l + line_width // 2),
+        (0, nx, r - line_width // 2, r + line_width // 2),
+    ])
+
+def isolated_line_rects(nx, width=6, length=None):
+    c = nx // 2
+    if length is None:
+        return clip_rects(nx, [(0, nx, c - width // 2, c + width // 2)])
+    return clip_rects(nx, [(c - length // 2, c + length // 2, c - width // 2, c + width // 2)])
+
+def dense_lines_rects(nx, width=6, pitch=20):
+    return clip_rects(nx, [
+        (0, nx, x + pitch // 2 - width // 2, x + pitch // 2 + width // 2)
+        for x in range(0, nx, pitch)
+    ])
+
+def two_lines_mask(nx, line_width=6, spacing=30):
+    return rects_to_mask(nx, two_lines_rects(nx, line_width, spacing))
+
+def isolated_line(nx, width=6, length=None):
+    return rects_to_mask(nx, isolated_line_rects(nx, width, length))
+
+def dense_lines(nx, width=6, pitch=20):
+    return rects_to_mask(nx, dense_lines_rects(nx, width, pitch))
+
+def line_end(nx, width=6, length=200):
+    return isolated_line(nx, width, length)
+
+def straight_line(nx, width=8, length=300):
+    return isolated_line(nx, width, length)
+
+def plain_line(nx, width=8):
+    return isolated_line(nx, width)
+
+def gate_mask(nx, width=12):
+    return isolated_line(nx, width)
+
+# ============================================================
+# 2-D hotspot geometries (week2)
+# ============================================================
+def corner_rects(nx, width=8, arm=200):
+    c = nx // 2
+    return clip_rects(nx, [
+        (c - width // 2, c + width // 2, c, c + arm),
+        (c + width // 2, c + arm, c - width // 2, c + width // 2),
+        (c, c + width // 2, c - width // 2, c),
+    ])
+
+def jog_rects(nx, width=8, arm=200, shift=30):
+    c = nx // 2
+    return clip_rects(nx, [
+        (c - arm // 2, c, c - width // 2, c + width // 2),
+        (c, c + arm // 2, c + shift - width // 2, c + shift + width // 2),
+    ])
+
+def t_junction_rects(nx, width=8, arm=200):
+    c = nx // 2
+    return clip_rects(nx, [
+        (c - arm // 2, c + arm // 2, c - width // 2, c + width // 2),
+        (c - width // 2, c + width // 2, c + width // 2, c + arm // 2),
+    ])
+
+def corner_pattern(nx, width=8, arm=200):
+    return rects_to_mask(nx, corner_rects(nx, width, arm))
+
+def jog_pattern(nx, width=8, arm=200, shift=30):
+    return rects_to_mask(nx, jog_rects(nx, width, arm, shift))
+
+def t_junction(nx, width=8, arm=200):
+    return rects_to_mask(nx, t_junction_rects(nx, width, arm))
+
+# ============================================================
+# Contacts and OPC (week3 / week4)
+# ============================================================
+def contact_hole(nx, radius=6):
+    y, x = np.ogrid[:nx, :nx]
+    c = nx // 2
+    return ((x - c)**2 + (y - c)**2 <= radius**2).astype(float)
+
+def opc_line_rects(nx, width=8, serif=3):
+    c = nx // 2
+    rects = isolated_line_rects(nx, width)
+    for y in range(0, nx, 12):
+        rects.append((y, y + serif, c - width // 2 - serif, c - width // 2))
+        rects.append((y, y + serif, c + width // 2, c + width // 2 + serif))
+    return clip_rects(nx, rects)
+
+def opc_line(nx, width=8, serif=3):
+    return rects_to_mask(nx, opc_line_rects(nx, width, serif))
+
+PATTERNS = {
+    "two_lines_mask": two_lines_mask,
+    "isolated_line": isolated_line,
+    "dense_lines": dense_lines,
+    "line_end": line_end,
+    "straight_line": straight_line,
+    "plain_line": plain_line,
+    "gate_mask": gate_mask,
+    "corner_pattern": corner_pattern,
+    "jog_pattern": jog_pattern,
+    "t_junction": t_junction,
+    "contact_hole": contact_hole,
+    "opc_line": opc_line,
+}
+
+RECT_PATTERNS = {
+    "two_lines_mask": two_lines_rects,
+    "isolated_line": isolated_line_rects,
+    "dense_lines": dense_lines_rects,
+    "line_end": lambda nx, width=6, length=200: isolated_line_rects(nx, width, length),
+    "straight_line": lambda nx, width=8, length=300: isolated_line_rects(nx, width, length),
+    "plain_line": lambda nx, width=8: isolated_line_rects(nx, width),
+    "gate_mask": lambda nx, width=12: isolated_line_rects(nx, width),
+    "corner_pattern": corner_rects,
+    "jog_pattern": jog_rects,
+    "t_junction": t_junction_rects,
+    "opc_line": opc_line_rects,
+}
@@ -0,0 +1,110 @@
+import numpy as np
+
+# ============================================================
+# Sub-pixel edges along a profile (day7 - day10)
+# ============================================================
+def find_edges_subpixel(profile, threshold):
+    p = np.asarray(profile) - threshold
+    i = np.nonzero(p[:-1] * p[1:] < 0)[0]
+    return i + p[i] / (p[i] - p[i + 1])
+
+def profile_edge(profile, threshold, edge=0):
+    edges = find_edges_subpixel(profile, threshold)
+    if len(edges) > edge:
+        return edges[edge]
+    return np.nan
+
+# ============================================================
+# Row-wise printed edges (day19 - day21)
+# ============================================================
+def row_edges(printed):
+    """First and last printed column of every row (NaN for empty rows)."""
+    printed = np.asarray(printed, dtype=bool)
+    nx = printed.shape[-1]
+    any_row = printed.any(axis=-1)
+    left = np.argmax(printed, axis=-1).astype(float)
+    right = (nx - 1 - np.argmax(printed[..., ::-1], axis=-1)).astype(float)
+    left[~any_row] = np.nan
+    right[~any_row] = np.nan
+    return left, right
+
+def run_edges(printed, column):
+    """
+    First and last column of the printed run through `column` in every
+    row (NaN where that pixel did not print): one line of a multi-line
+    pattern, where row_edges spans the outermost lines.
+    """
+    printed = np.asarray(printed, dtype=bool)
+    nx = printed.shape[-1]
+    gap_left = ~printed[..., column::-1]
+    gap_right = ~printed[..., column:]
+    left = np.where(gap_left.any(axis=-1), column - np.argmax(gap_left, axis=-1) + 1, 0).astype(float)
+    right = np.where(gap_right.any(axis=-1), column + np.argmax(gap_right, axis=-1) - 1, nx - 1).astype(float)
+    left[~printed[..., column]] = np.nan
+    right[~printed[..., column]] = np.nan
+    return left, right
+
+def row_edges_subpixel(values, threshold):
+    """
+    Sub-pixel first / last threshold crossing of every row of a
+    continuous image (aerial, clear depth) and the per-pixel slope there:
+    dict of left, right, left_slope, right_slope (NaN where a row never
+    crosses inside the field).
+    """
+    p = np.asarray(values, dtype=float) - threshold
+    above = p > 0
+    n = p.shape[-1]
+    any_row = above.any(axis=-1)
+    first = np.argmax(above, axis=-1)
+    last = n - 1 - np.argmax(above[..., ::-1], axis=-1)
+
+    def at(index):
+        return np.take_along_axis(p, np.clip(index, 0, n - 1)[..., None], -1)[..., 0]
+
+    out = {}
+    for name, inside, side in (("left", first, 1), ("right", last, -1)):
+        outside = inside - side
+        ok = any_row & (outside >= 0) & (outside < n)
+        slope = at(inside) - at(outside)
+        frac = -at(outside) / np.where(ok, slope, 1.0)
+        out[name] = np.where(ok, outside + side * frac, np.nan)
+        out[f"{name}_slope"] = np.where(ok, np.abs(slope), np.nan)
+    return out
+
+# ============================================================
+# Distance-field EPE (day11 - day14)
+# ============================================================
+def distance_epe(target, printed):
+    """Signed distance approximation, positive = shrink."""
+    from scipy.ndimage import distance_transform_edt
+
+    dist_target = distance_transform_edt(~np.asarray(target, dtype=bool))
+    dist_printed = distance_transform_edt(~np.asarray(printed, dtype=bool))
+    return dist_printed - dist_target
+
+def worst_epe(epe_map, roi):
+    ny, nx = epe_map.shape
+    cy, cx = ny // 2, nx // 2
+    return np.nanmax(np.abs(epe_map[cy - roi : cy + roi, cx - roi : cx + roi]))
+
+# ============================================================
+# Stochastic failure classification (day15 - day18)
+# ============================================================
+def hole_open(printed):
+    ny, nx = printed.shape
+    return bool(printed[ny // 2, nx // 2])
+
+def line_failure(printed, expected=2, connectivity=1):
+    """
+    "short" when fewer than `expected` printed components remain,
+    "open" when some row prints nothing at all, else "pass".
+    """
+    from scipy.ndimage import generate_binary_structure, label
+
+    structure = generate_binary_structure(2, connectivity)
+    _, num = label(printed, structure)
+    if num < expected:
+        return "short"
+    if not np.asarray(printed).any(axis=1).all():
+        return "open"
+    return "pass"
@@ -0,0 +1,257 @@
+import numpy as np
+
+from litho import manhattan, metrology, optics, resist, sparse, telemetry, variance
+
+# ============================================================
+# Model-based OPC
+# ============================================================
+# The target's outline is cut into fragments: straight runs of boundary
+# pixels sharing an outward normal, at most `length` pixels long.  Each
+# fragment carries a bias b (pixels, + = outward) and owns a strip of
+# pixels along its normal; the pixel at depth k (0 = first pixel
+# outside the target edge, -1 = last pixel inside) has coverage
+#
+#     clip(b - k, 0, 1)
+#
+# so b = 0 is the target itself and fractional biases become one grey
+# row, which keeps the feedback loop continuous.  Strips meet at
+# corners and staircases, so the mask is their union rather than their
+# sum: a pixel outside the target takes the largest coverage any strip
+# gives it, a pixel inside the smallest, which keeps every pixel in
+# [0, 1].  render(snap=True) rounds the biases to whole pixels for a
+# binary mask.
+#
+# Each iteration images only the control sites: a short profile along
+# every fragment's normal through its midpoint.  The resist chain is
+# monotone in the aerial image, so the printed edge is where the
+# profile crosses resist.aerial_threshold, and
+#
+#     EPE = printed edge - target edge          (+ = feature too big)
+#     b  <- b - damping * EPE
+#
+# The mask is only re-evaluated on the strip pixels, and the pixels
+# whose coverage changed are merged into weighted one-pixel-high runs
+# whose manhattan.rect_sites contributions update the site intensities:
+# the cost of an iteration scales with the pixels that changed times
+# sites, not with the field.  The starting profiles come from one FFT
+# image of the target; render() rebuilds the corrected mask.  A
+# fragment whose profile never crosses the threshold reports an EPE of
+# +-half; the result's "converged" says whether every |EPE| reached tol.
+
+FRAGMENT = 12                   # max fragment length (pixels)
+PROFILE = 6                     # profile half-length along the normal
+DAMPING = 0.6
+MAX_BIAS = 4.0
+RECT_CHUNK = 256                # moved rectangles per rect_sites call
+
+def fragment(target, length=FRAGMENT):
+    """
+    Fragments of a binary target as a dict of (F,) arrays: axis (0 =
+    normal along y), sign (outward), edge (grid line of the target
+    edge along the normal), lo / hi (span along the edge).
+    """
+    target = np.asarray(target) > 0.5
+    pad = np.pad(target, 1, mode="edge")        # shapes running off the field have no edge there
+    frags = {"axis": [], "sign": [], "edge": [], "lo": [], "hi": []}
+    for axis in (0, 1):
+        for sign in (-1, 1):
+            neighbour = np.roll(pad, -sign, axis=axis)[1:-1, 1:-1]
+            boundary = target & ~neighbour
+            if axis == 1:
+                boundary = boundary.T
+            for row in np.nonzero(boundary.any(axis=1))[0]:
+                p = np.zeros(boundary.shape[1] + 2, dtype=bool)
+                p[1:-1] = boundary[row]
+                xs = np.nonzero(p[1:] != p[:-1])[0]
+                for x0, x1 in zip(xs[0::2], xs[1::2]):
+                    pieces = -(-(x1 - x0) // length)
+                    cuts = np.linspace(x0, x1, pieces + 1).round().astype(int)
+                    for a, b in zip(cuts[:-1], cuts[1:]):
+                        frags["axis"].append(axis)
+                        frags["sign"].append(sign)
+                        frags["edge"].append(row + (sign > 0))
+                        frags["lo"].append(a)
+                        frags["hi"].append(b)
+    return {k: np.array(v, dtype=int) for k, v in frags.items()}
+
+def _depth_rows(frags, depth):
+    """Pixel row / column along the normal at the given depths, (F, ...)."""
+    depth = np.asarray(depth)
+    shape = (-1,) + (1,) * (depth.ndim - 1 if depth.ndim else 0)
+    sign = frags["sign"].reshape(shape)
+    edge = frags["edge"].reshape(shape)
+    return np.where(sign > 0, edge + depth, edge - 1 - depth)
+
+def control_sites(frags, half=PROFILE):
+    """(ys, xs) of every fragment's profile, shape (F, 2 * half), inside to outside."""
+    depth = np.arange(-half, half)[None, :]
+    normal = _depth_rows(frags, np.broadcast_to(depth, (len(frags["edge"]), 2 * half)))
+    along = ((frags["lo"] + frags["hi"]) // 2)[:, None] + 0 * depth
+    ys = np.where(frags["axis"][:, None] == 0, normal, along)
+    xs = np.where(frags["axis"][:, None] == 0, along, normal)
+    return ys, xs
+
+def measure_epe(profiles, threshold, half=PROFILE):
+    """
+    Signed EPE per fragment from (F, 2 * half) inside-to-outside
+    profiles: crossing nearest the target edge, or +-half when the
+    profile never crosses.
+    """
+    epe = np.empty(len(profiles))
+    for i, profile in enumerate(profiles):
+        # profile index j sits at normal position j - half + 0.5
+        pos = metrology.find_edges_subpixel(profile, threshold) - half + 0.5
+        if len(pos):
+            epe[i] = pos[np.argmin(np.abs(pos))]
+        else:
+            epe[i] = half if profile[-1] > threshold else -half
+    return epe
+
+def strips(frags, shape, max_bias=MAX_BIAS):
+    """
+    Every in-field pixel of every fragment's strip, depths -ceil(max_bias)
+    .. ceil(max_bias) - 1: dict of (S,) arrays frag, depth and pixel (an
+    index into the (P,) unique in-field pixels ys, xs).
+    """
+    ny, nx = shape
+    d = int(np.ceil(max_bias))
+    depths = np.arange(-d, d)
+    frag, depth, ys, xs = [], [], [], []
+    for i in range(len(frags["edge"])):
+        rows = _depth_rows({"sign": frags["sign"][i:i + 1], "edge": frags["edge"][i:i + 1]}, depths)
+        along = np.arange(frags["lo"][i], frags["hi"][i])
+        normal, along = np.meshgrid(rows, along, indexing="ij")
+        y, x = (normal, along) if frags["axis"][i] == 0 else (along, normal)
+        frag.append(np.full(y.size, i))
+        depth.append(np.repeat(depths, len(along[0])))
+        ys.append(y.ravel())
+        xs.append(x.ravel())
+    frag, depth, ys, xs = (np.concatenate(v) if v else np.zeros(0, dtype=int) for v in (frag, depth, ys, xs))
+    inside = (ys >= 0) & (ys < ny) & (xs >= 0) & (xs < nx)
+    flat, pixel = np.unique(ys[inside] * nx + xs[inside], return_inverse=True)
+    return {"frag": frag[inside], "depth": depth[inside], "pixel": pixel,
+            "ys": flat // nx, "xs": flat % nx}
+
+def coverage(strip, target, bias):
+    """
+    Mask value at the strip pixels for biases: the target, cut back to
+    the smallest coverage of any strip reaching a pixel from inside and
+    grown to the largest of any strip reaching it from outside.
+    """
+    cover = np.clip(bias[strip["frag"]] - strip["depth"], 0, 1)
+    n = len(strip["ys"])
+    grow, keep = np.zeros(n), np.ones(n)
+    out = strip["depth"] >= 0
+    np.maximum.at(grow, strip["pixel"][out], cover[out])
+    np.minimum.at(keep, strip["pixel"][~out], cover[~out])
+    base = np.asarray(target, dtype=float)[strip["ys"], strip["xs"]]
+    return np.maximum(base * keep, grow)
+
+def _runs(ys, xs, weights):
+    """Equal-weight pixels adjacent along x, as (first index, last index) pairs in sorted order."""
+    if not len(ys):
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    order = np.lexsort((xs, ys))
+    ys, xs, weights = ys[order], xs[order], weights[order]
+    start = np.ones(len(ys), dtype=bool)
+    start[1:] = (ys[1:] != ys[:-1]) | (xs[1:] != xs[:-1] + 1) | (weights[1:] != weights[:-1])
+    first = np.nonzero(start)[0]
+    last = np.append(first[1:], len(ys)) - 1
+    return order[first], order[last]
+
+def pixel_runs(ys, xs, weights):
+    """
+    Weighted pixels merged into one-pixel-wide runs along x, then the
+    pixels left alone along y: (rects (R, 4), weights (R,)).
+    """
+    first, last = _runs(ys, xs, weights)
+    single = first == last
+    rows = np.stack([ys[first], ys[first] + 1, xs[first], xs[last] + 1], axis=1)[~single]
+    row_weights = weights[first[~single]]
+    ys, xs, weights = ys[first[single]], xs[first[single]], weights[first[single]]
+    first, last = _runs(xs, ys, weights)
+    cols = np.stack([ys[first], ys[last] + 1, xs[first], xs[first] + 1], axis=1)
+    return np.concatenate([rows, cols]).reshape(-1, 4), np.concatenate([row_weights, weights[first]])
+
+def render(target, frags, bias, snap=False):
+    """
+    Corrected mask in [0, 1]: the target with every fragment's biased
+    strip; snap=True rounds the biases to whole pixels (binary mask).
+    """
+    bias = np.round(bias) if snap else np.asarray(bias, dtype=float)
+    mask = np.asarray(target, dtype=float).copy()
+    if len(bias):
+        strip = strips(frags, mask.shape, max(np.abs(bias).max(), 1))
+        mask[strip["ys"], strip["xs"]] = coverage(strip, target, bias)
+    return mask
+
+def _site_delta(rects, weights, ys, xs, table):
+    delta = np.zeros(ys.size)
+    for start in range(0, len(rects), RECT_CHUNK):
+        chunk = slice(start, start + RECT_CHUNK)
+        delta += manhattan.rect_sites(rects[chunk], ys.ravel(), xs.ravel(), table, weights=weights[chunk])
+    return delta.reshape(ys.shape)
+
+# ============================================================
+# Correction loop
+# ============================================================
+def correct(target, psf, resist_params=None, dose=1.0, length=FRAGMENT, damping=DAMPING,
+            max_bias=MAX_BIAS, tol=0.05, max_iter=30, half=PROFILE, psf_tol=sparse.DEFAULT_TOL,
+            verify=True, photons=None):
+    """
+    Iterate fragment biases until every |EPE| < tol (pixels) or
+    max_iter bias updates.  Returns a dict with fragments, bias, epe
+    (measured after the last update), the max |EPE| history, the number
+    of updates, "converged" and the fragments still out of tol, the
+    rendered grey-level mask, its binary (snapped) version and, with
+    verify, the EPE of a full re-simulation of each.  With photons (per
+    pixel at the dosed image), "sigma" holds each fragment's predicted
+    shot-noise edge sigma (litho.variance).
+    """
+    target = np.asarray(target, dtype=float)
+    ny, nx = target.shape
+    threshold = resist.aerial_threshold(resist_params) / dose
+    table = manhattan.psf_integral_table(sparse.truncate_psf(optics.psf_kernel(psf), psf_tol))
+
+    frags = fragment(target, length)
+    strip = strips(frags, target.shape, max_bias)
+    ys, xs = control_sites(frags, half)
+    ys_in, xs_in = np.clip(ys, 0, ny - 1), np.clip(xs, 0, nx - 1)
+    with telemetry.timer("imaging"):
+        profiles = optics.aerial_image(target, psf, method="fft")[ys_in, xs_in]
+
+    bias = np.zeros(len(frags["edge"]))
+    values = coverage(strip, target, bias)
+    history = []
+    # max_iter updates, each followed by a measurement, so the returned
+    # epe always belongs to the returned bias
+    for it in range(max_iter + 1):
+        with telemetry.timer("edges"):
+            epe = measure_epe(profiles, threshold, half)
+        history.append(float(np.abs(epe).max()) if len(epe) else 0.0)
+        if history[-1] < tol or it == max_iter:
+            break
+        new = np.clip(bias - damping * epe, -max_bias, max_bias)
+        new[np.abs(epe) < tol] = bias[np.abs(epe) < tol]
+        with telemetry.timer("imaging"):
+            new_values = coverage(strip, target, new)
+            changed = np.nonzero(new_values != values)[0]
+            rects, weights = pixel_runs(strip["ys"][changed], strip["xs"][changed],
+                                        new_values[changed] - values[changed])
+            profiles = profiles + _site_delta(rects, weights, ys_in, xs_in, table)
+        telemetry.count("opc_moves", int((new != bias).sum()))
+        bias, values = new, new_values
+
+    converged = bool(history) and history[-1] < tol
+    out = {"fragments": frags, "bias": bias, "epe": epe, "history": history,
+           "iterations": len(history) - 1, "converged": converged,
+           "unconverged": np.nonzero(np.abs(epe) >= tol)[0],
+           "mask": render(target, frags, bias), "mask_binary": render(target, frags, bias, snap=True)}
+    if photons:
+        out["sigma"] = variance.profile_sigma(profiles * dose, threshold * dose, photons)
+    if verify:
+        with telemetry.timer("imaging"):
+            for key, mask in (("verify_epe", out["mask"]), ("verify_binary_epe", out["mask_binary"])):
+                aerial = optics.aerial_image(mask, psf, method="fft")
+                out[key] = measure_epe(aerial[ys_in, xs_in], threshold, half)
+    return out
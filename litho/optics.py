@@ -0,0 +1,210 @@
+import numpy as np
+
+from litho import fft, sparse
+
+# scipy is imported inside the functions that need it, so importing the
+# package (CLI start-up, worker processes) costs NumPy only.
+
+# ============================================================
+# Pupil -> PSF
+# ============================================================
+def circular_pupil(nx, radius):
+    y, x = np.ogrid[-nx//2:nx//2, -nx//2:nx//2]
+    return (x*x + y*y <= radius*radius).astype(float)
+
+def psf_from_pupil(pupil):
+    """Incoherent PSF |ifft(pupil)|^2, centred at [nx//2, nx//2], peak 1."""
+    field = np.fft.ifft2(np.fft.ifftshift(pupil))
+    psf = np.fft.fftshift(np.abs(field)**2)
+    return psf / psf.max()
+
+def defocus_psf(psf, focus_sigma):
+    """Gaussian blur used throughout week2/week3 as the defocus model."""
+    if focus_sigma <= 0:
+        return psf
+    from scipy.ndimage import gaussian_filter
+
+    psf = gaussian_filter(psf, sigma=focus_sigma)
+    return psf / psf.max()
+
+_PSF_CACHE = {}
+
+def make_psf(nx, pupil_radius, focus_sigma=0.0):
+    key = (nx, pupil_radius, focus_sigma)
+    if key not in _PSF_CACHE:
+        psf = psf_from_pupil(circular_pupil(nx, pupil_radius))
+        _PSF_CACHE[key] = defocus_psf(psf, focus_sigma)
+    return _PSF_CACHE[key]
+
+def psf_kernel(psf):
+    """
+    Odd-sized view of a centred PSF, so that "same" convolution is
+    exactly centred (an even kernel shifts the image by one pixel).
+    """
+    ny, nx = psf.shape
+    return psf[1 - ny % 2:, 1 - nx % 2:]
+
+# ============================================================
+# Aerial image = mask ⊗ PSF
+# ============================================================
+def aerial_image(mask, psf, dose=1.0, method="auto", tol=None):
+    """
+    Incoherent aerial image.
+
+    method = "fft" (full-field FFT convolution, see litho.fft), "sparse" (sum of shifted,
+    truncated PSF kernels), "rects" (rectangle decomposition against the
+    PSF integral table, binary masks only) or "auto" (pick the cheaper
+    of fft/sparse from the mask fill and the truncated kernel size).
+    tol is the PSF truncation of sparse / rects / auto; None means
+    sparse.DEFAULT_TOL for sparse and rects but exact (0) for auto, see
+    sparse.truncation_error for the error bound.
+    """
+    kernel = psf_kernel(psf)
+
+    if method == "auto":
+        tol = tol or 0.0
+        method = sparse.choose_method(mask, kernel, tol)
+    elif tol is None:
+        tol = sparse.DEFAULT_TOL
+
+    if method == "sparse":
+        aerial = sparse.sparse_convolve(mask, sparse.truncate_psf(kernel, tol))
+    elif method == "rects":
+        from litho import manhattan
+        from litho.masks import decompose_rects
+        table = manhattan.psf_integral_table(sparse.truncate_psf(kernel, tol))
+        aerial = manhattan.rect_aerial(decompose_rects(mask), mask.shape, table)
+    elif method == "fft":
+        aerial = fft.convolve_same(mask, kernel)
+    else:
+        raise ValueError(f"unknown imaging method: {method!r}")
+
+    return aerial * dose
+
+# ============================================================
+# Batched imaging of many masks
+# ============================================================
+BATCH_BYTES = 16e6              # spectra in flight per FFT batch
+
+def fft_batch_size(shape, kernel_shape):
+    """
+    Masks per batched transform: as many as fit their spectra (and the
+    product with the OTF) in BATCH_BYTES, on any number of FFT threads.
+    The budget is kept near cache size; far larger batches only fall
+    out of cache.
+    """
+    ny, nx = fft.fast_shape(shape, kernel_shape)
+    per_mask = ny * (nx // 2 + 1) * 16 * 2
+    return max(1, int(BATCH_BYTES // per_mask))
+
+def aerial_batch(stack, psf, dose=1.0, method="fft", tol=None, batch=None):
+    """
+    Aerial images of a (K, ny, nx) stack of masks sharing one PSF.
+
+    FFT images go through one batched rfft2, a broadcast multiply with
+    the cached kernel spectrum and one batched irfft2, batch masks at a
+    time (default: fft_batch_size).  With method="auto",
+    masks the cost model sends to the sparse path are imaged one by one
+    and the rest are batched; other methods fall back to aerial_image.
+    tol is as in aerial_image.
+    """
+    stack = np.asarray(stack)
+    kernel = psf_kernel(psf)
+    out = np.empty(stack.shape)
+
+    if method == "fft":
+        batched = list(range(len(stack)))
+    elif method == "auto":
+        tol = tol or 0.0
+        batched = []
+        for i, mask in enumerate(stack):
+            if sparse.choose_method(mask, kernel, tol) == "fft":
+                batched.append(i)
+            else:
+                out[i] = aerial_image(mask, psf, method="sparse", tol=tol)
+    else:
+        for i, mask in enumerate(stack):
+            out[i] = aerial_image(mask, psf, method=method, tol=tol)
+        return out * dose
+
+    batch = batch or fft_batch_size(stack.shape[1:], kernel.shape)
+    for start in range(0, len(batched), batch):
+        chunk = batched[start:start + batch]
+        out[chunk] = fft.convolve_same(stack[chunk], kernel)
+    return out * dose
+
+# ============================================================
+# Incremental updates for local mask edits
+# ============================================================
+# The incoherent image is linear in the mask, so after an edit
+#
+#     aerial_new = aerial_old + dose * (mask_new - mask_old) ⊗ PSF
+#
+# and the delta only reaches the edited region dilated by the truncated
+# kernel's half-width.  Edits come as weighted rectangles (serifs,
+# fragment moves; single pixels are 1 x 1 rectangles), imaged through
+# the PSF integral table, or as dense delta patches, convolved with the
+# truncated kernel over the patch plus its margin.  The cost scales
+# with the edit, not the field; the truncation error is below tol times
+# the PSF peak per unit of edited area.
+
+_LOCAL_CACHE = {}
+LOCAL_CACHE_SIZE = 16
+
+def local_kernel(psf, tol=sparse.DEFAULT_TOL):
+    """Truncated kernel and its integral table for psf, cached per PSF array."""
+    key = (id(psf), tol)
+    cached = _LOCAL_CACHE.get(key)
+    if cached is not None and cached[0] is psf:
+        return cached[1], cached[2]
+    from litho import manhattan
+
+    if len(_LOCAL_CACHE) >= LOCAL_CACHE_SIZE:
+        _LOCAL_CACHE.clear()
+    kernel = sparse.truncate_psf(psf_kernel(psf), tol)
+    table = manhattan.psf_integral_table(kernel)
+    _LOCAL_CACHE[key] = (psf, kernel, table)
+    return kernel, table
+
+def edit_patches(old_mask, new_mask):
+    """(y0, x0, delta) for every connected region where two masks differ."""
+    from scipy.ndimage import find_objects, label
+
+    delta = np.asarray(new_mask, dtype=float) - np.asarray(old_mask, dtype=float)
+    labels, _ = label(delta != 0, structure=np.ones((3, 3)))
+    return [(sl[0].start, sl[1].start, delta[sl]) for sl in find_objects(labels)]
+
+def update_aerial(aerial, psf, rects=(), weights=None, patches=(), dose=1.0,
+                  tol=sparse.DEFAULT_TOL, inplace=False):
+    """
+    Aerial image after local mask edits.
+
+    rects are (y0, y1, x0, x1) rectangles added with weights (default
+    1; -1 removes, fractions for grey levels); patches are (y0, x0,
+    delta) arrays of mask change, e.g. from edit_patches(old, new).
+    aerial is updated in place with inplace=True.
+    """
+    from litho import manhattan
+
+    kernel, table = local_kernel(psf, tol)
+    out = aerial if inplace else aerial.copy()
+    ny, nx = out.shape
+    h = kernel.shape[0] // 2
+
+    if len(rects):
+        weights = np.ones(len(rects)) if weights is None else np.asarray(weights, dtype=float)
+        manhattan.add_rects(out, rects, table, weights * dose)
+
+    for y0, x0, delta in patches:
+        py, px = delta.shape
+        padded = np.pad(np.asarray(delta, dtype=float) * dose, h)
+        if sparse.choose_method(padded, kernel, 0.0) == "sparse":
+            contrib = sparse.sparse_convolve(padded, kernel)
+        else:
+            contrib = fft.convolve_same(padded, kernel)
+        # contrib[i, j] lands on aerial[y0 - h + i, x0 - h + j]
+        ya, yb = max(y0 - h, 0), min(y0 + py + h, ny)
+        xa, xb = max(x0 - h, 0), min(x0 + px + h, nx)
+        if ya < yb and xa < xb:
+            out[ya:yb, xa:xb] += contrib[ya - y0 + h:yb - y0 + h, xa - x0 + h:xb - x0 + h]
+    return out
@@ -0,0 +1,262 @@
+import numpy as np
+
+# ============================================================
+# Process-window analytics
+# ============================================================
+# Sweep results arrive as cubes value[site, focus, dose] (a single
+# feature is a cube with one site).  The pipeline here is
+#
+#   fit_bossung      CD/EPE(focus, dose) as a polynomial per site
+#   evaluate         fitted surfaces on a fine focus x dose grid
+#   spec_window      in-spec map: |value - target| <= tol
+#   common_window    AND of the windows of many sites / features
+#   el_vs_dof        best exposure latitude for every depth of focus
+#   max_rectangle    largest inscribed dose x focus rectangle
+#   max_ellipse      largest inscribed axis-aligned ellipse
+#
+# and everything is vectorised over sites, so a full layout's common
+# window costs a few array passes.  Exposure latitude is in percent of
+# the window's centre dose, like the week1/week2 reports.
+
+def _unit(x):
+    """Affine map of x onto [-1, 1] (keeps the polynomial fit well conditioned)."""
+    x = np.asarray(x, dtype=float)
+    lo, hi = x.min(), x.max()
+    half = (hi - lo) / 2 or 1.0
+    return (lo + hi) / 2, half
+
+def _basis(focus, dose, deg_focus, deg_dose, scale):
+    fc, fh, dc, dh = scale
+    f = (np.asarray(focus, dtype=float) - fc) / fh
+    d = (np.asarray(dose, dtype=float) - dc) / dh
+    return np.stack([f**i * d**j for i in range(deg_focus + 1) for j in range(deg_dose + 1)], axis=-1)
+
+def fit_bossung(cube, focus, dose, deg_focus=2, deg_dose=2):
+    """
+    Least-squares Bossung surface per site.  cube is (S, F, D) or (F, D);
+    NaN cells are left out of their site's fit.  Returns a fit dict for
+    evaluate() with coeffs (S, terms).
+    """
+    cube = np.asarray(cube, dtype=float)
+    if cube.ndim == 2:
+        cube = cube[None]
+    S = cube.shape[0]
+    scale = _unit(focus) + _unit(dose)
+
+    ff, dd = np.meshgrid(focus, dose, indexing="ij")
+    A = _basis(ff.ravel(), dd.ravel(), deg_focus, deg_dose, scale)        # (F*D, T)
+    y = cube.reshape(S, -1)
+    w = np.isfinite(y)
+    y = np.where(w, y, 0.0)
+
+    if w.all():
+        coeffs = np.linalg.lstsq(A, y.T, rcond=None)[0].T
+    else:
+        # per-site normal equations with 0/1 weights, solved as one batch
+        AtA = np.einsum("pt,sp,pu->stu", A, w.astype(float), A)
+        Aty = np.einsum("pt,sp->st", A, y * w)
+        ridge = 1e-10 * np.eye(A.shape[1])
+        coeffs = np.linalg.solve(AtA + ridge, Aty[..., None])[..., 0]
+
+    residual = np.where(w, y - coeffs @ A.T, np.nan)
+    return {
+        "coeffs": coeffs,
+        "deg_focus": deg_focus,
+        "deg_dose": deg_dose,
+        "scale": scale,
+        "rms": np.sqrt(np.nanmean(residual**2, axis=1)),
+    }
+
+def evaluate(fit, focus, dose):
+    """Fitted surfaces on the focus x dose grid: (S, len(focus), len(dose))."""
+    ff, dd = np.meshgrid(focus, dose, indexing="ij")
+    A = _basis(ff, dd, fit["deg_focus"], fit["deg_dose"], fit["scale"])
+    return np.einsum("fdt,st->sfd", A, fit["coeffs"])
+
+def spec_window(values, target=0.0, tol=None, lo=None, hi=None):
+    """In-spec map: |values - target| <= tol, or lo <= values <= hi."""
+    values = np.asarray(values)
+    if tol is not None:
+        return np.abs(values - target) <= tol
+    ok = np.isfinite(values)
+    if lo is not None:
+        ok &= values >= lo
+    if hi is not None:
+        ok &= values <= hi
+    return ok
+
+def common_window(windows):
+    """Cells inside every site's window; windows is (S, F, D) or a list of (F, D)."""
+    return np.logical_and.reduce(np.asarray(windows, dtype=bool), axis=0)
+
+# ============================================================
+# Exposure latitude vs depth of focus
+# ============================================================
+def _longest_runs(rows):
+    """Length and end index of the longest run of True along the last axis."""
+    length = np.zeros(rows.shape[:-1], dtype=int)
+    best = np.zeros(rows.shape[:-1], dtype=int)
+    end = np.zeros(rows.shape[:-1], dtype=int)
+    for j in range(rows.shape[-1]):
+        length = np.where(rows[..., j], length + 1, 0)
+        better = length > best
+        best = np.where(better, length, best)
+        end = np.where(better, j, end)
+    return best, end
+
+def _focus_bands(window):
+    """
+    For every band of consecutive focus rows [i, i + h): the longest
+    dose run inside all of them.  Returns run[h-1, ..., i] and end.
+    """
+    window = np.asarray(window, dtype=bool)
+    F = window.shape[-2]
+    runs, ends = [], []
+    band = window
+    for h in range(1, F + 1):
+        if h > 1:
+            band = band[..., :-1, :] & window[..., h - 1:, :]
+        run, end = _longest_runs(band)
+        pad = [(0, 0)] * (run.ndim - 1) + [(0, h - 1)]
+        runs.append(np.pad(run, pad))
+        ends.append(np.pad(end, pad))
+    return np.stack(runs), np.stack(ends)
+
+def _latitude(run, end, dose):
+    """Exposure latitude in % of the centre dose for runs of grid cells."""
+    dose = np.asarray(dose, dtype=float)
+    start = np.clip(end - run + 1, 0, len(dose) - 1)
+    d_lo, d_hi = dose[start], dose[end]
+    width = np.where(run > 0, d_hi - d_lo, 0.0)
+    centre = np.where(run > 0, (d_hi + d_lo) / 2, 1.0)
+    return 100 * width / centre
+
+def el_vs_dof(window, focus, dose):
+    """
+    Best exposure latitude (%) for each depth of focus.  window is
+    (..., F, D) on a uniform focus grid; returns dof (F,) and el (..., F),
+    where dof[h] = h * focus step and el == 0 where no window that deep exists.
+    """
+    focus = np.asarray(focus, dtype=float)
+    runs, ends = _focus_bands(window)
+    el = _latitude(runs, ends, dose)                     # (F, ..., F)
+    el = np.moveaxis(el.max(axis=-1), 0, -1)
+    step = focus[1] - focus[0] if len(focus) > 1 else 0.0
+    dof = step * np.arange(len(focus))
+    return dof, el
+
+def max_rectangle(window, focus, dose, dose_scale=None):
+    """
+    Largest inscribed rectangle by DOF x EL area (dose_scale=None) or by
+    DOF x dose width (dose_scale=1).  Returns a dict of (...)-shaped
+    arrays: dof, el, focus range, dose range.
+    """
+    focus = np.asarray(focus, dtype=float)
+    dose = np.asarray(dose, dtype=float)
+    runs, ends = _focus_bands(window)                     # (F, ..., F)
+    H = runs.shape[0]
+    step = focus[1] - focus[0] if len(focus) > 1 else 0.0
+    height = (np.arange(H) * step).reshape((H,) + (1,) * (runs.ndim - 1))
+    el = _latitude(runs, ends, dose)
+    if dose_scale is None:
+        area = height * el
+    else:
+        area = height * np.where(runs > 0, (runs - 1) * (dose[1] - dose[0]) * dose_scale, 0.0)
+
+    flat = np.moveaxis(area, (0, -1), (-2, -1)).reshape(area.shape[1:-1] + (-1,))
+    best = flat.argmax(axis=-1)
+    h, i = np.unravel_index(best, (H, runs.shape[-1]))
+
+    def pick(a):
+        a = np.moveaxis(a, (0, -1), (-2, -1)).reshape(flat.shape)
+        return np.take_along_axis(a, best[..., None], -1)[..., 0]
+
+    run, end = pick(runs), pick(ends)
+    start = np.clip(end - run + 1, 0, len(dose) - 1)
+    return {
+        "dof": h * step,
+        "el": pick(el),
+        "focus_lo": focus[i],
+        "focus_hi": focus[np.minimum(i + h, len(focus) - 1)],
+        "dose_lo": np.where(run > 0, dose[start], np.nan),
+        "dose_hi": np.where(run > 0, dose[end], np.nan),
+    }
+
+# ============================================================
+# Inscribed ellipse
+# ============================================================
+def max_ellipse(window, focus, dose, aspects=None):
+    """
+    Largest axis-aligned ellipse inside the window, in (focus, EL %)
+    units.  For each aspect ratio b/a (EL half-width per focus
+    half-width) the window's distance transform in scaled coordinates
+    gives every centre's largest radius; the best area over aspects wins.
+    Sites are stacked along a heavily weighted leading axis, so all of
+    them go through one EDT.
+    """
+    from scipy.ndimage import distance_transform_edt
+
+    window = np.asarray(window, dtype=bool)
+    focus = np.asarray(focus, dtype=float)
+    dose = np.asarray(dose, dtype=float)
+    single = window.ndim == 2
+    if single:
+        window = window[None]
+    S = window.shape[0]
+    df = focus[1] - focus[0]
+    dd = 100 * (dose[1] - dose[0]) / dose.mean()          # EL % per dose step
+    if aspects is None:
+        aspects = np.geomspace(0.05, 20, 25) * (dd * len(dose)) / (df * len(focus))
+
+    # a False frame: the ellipse may not leave the sampled grid
+    padded = np.pad(window, ((0, 0), (1, 1), (1, 1)))
+    best = {"area": np.zeros(S), "a": np.zeros(S), "b": np.zeros(S),
+            "focus": np.full(S, np.nan), "dose": np.full(S, np.nan)}
+    for aspect in aspects:
+        # unit circle in (focus / a, el / (aspect * a)) coordinates
+        dist = distance_transform_edt(padded, sampling=(1e6, df, dd / aspect))[:, 1:-1, 1:-1]
+        flat = dist.reshape(S, -1)
+        k = flat.argmax(axis=1)
+        a = flat[np.arange(S), k]
+        area = np.pi * a * a * aspect
+        better = area > best["area"]
+        fi, di = np.unravel_index(k, dist.shape[1:])
+        best["area"] = np.where(better, area, best["area"])
+        best["a"] = np.where(better, a, best["a"])
+        best["b"] = np.where(better, a * aspect, best["b"])
+        best["focus"] = np.where(better, focus[fi], best["focus"])
+        best["dose"] = np.where(better, dose[di], best["dose"])
+
+    out = {"focus": best["focus"], "dose": best["dose"], "dof": 2 * best["a"],
+           "el": 2 * best["b"], "area": best["area"]}
+    if single:
+        out = {k: v[0] for k, v in out.items()}
+    return out
+
+# ============================================================
+# One-call analysis of a sweep cube
+# ============================================================
+def analyze(cube, focus, dose, target=0.0, tol=None, lo=None, hi=None,
+            fine=(41, 61), deg_focus=2, deg_dose=2):
+    """
+    Fit, resample on a fine grid, and measure each site's window plus
+    the common window of all sites.
+    """
+    fit = fit_bossung(cube, focus, dose, deg_focus, deg_dose)
+    f_fine = np.linspace(np.min(focus), np.max(focus), fine[0])
+    d_fine = np.linspace(np.min(dose), np.max(dose), fine[1])
+    windows = spec_window(evaluate(fit, f_fine, d_fine), target, tol, lo, hi)
+    common = common_window(windows)
+    dof, el = el_vs_dof(windows, f_fine, d_fine)
+    return {
+        "fit": fit,
+        "focus": f_fine,
+        "dose": d_fine,
+        "windows": windows,
+        "common": common,
+        "dof": dof,
+        "el": el,
+        "common_el": el_vs_dof(common, f_fine, d_fine)[1],
+        "rectangle": max_rectangle(common, f_fine, d_fine),
+        "ellipse": max_ellipse(common, f_fine, d_fine),
+    }
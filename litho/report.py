@@ -0,0 +1,206 @@
+import atexit
+import importlib.util
+import json
+import os
+import warnings
+
+import numpy as np
+
+# ============================================================
+# Figure jobs off the simulation path
+# ============================================================
+# Plots are described as jobs - a kind, an output path and plain data -
+# and handed to submit().  What happens next depends on MODE:
+#
+#   "async"  render in a background process pool (default)
+#   "sync"   render immediately, in this process
+#   "defer"  only record the job; flush(directory) stores the jobs and
+#            their arrays, and `python -m litho report <directory>`
+#            renders them later, e.g. on another machine
+#   "off"    drop every job (--no-plots, LITHO_PLOTS=off)
+#
+# Kinds: image, heatmap, lines, hist, bar.  A path ending in .html is
+# rendered with plotly, anything else with matplotlib (Agg backend).
+# matplotlib and plotly are only imported by the renderers, so the
+# simulating process never pays for them in async / defer / off mode.
+# When one of them is not installed, async and sync runs skip its
+# figures with a warning instead of failing at the end of the run.
+
+MODE = os.environ.get("LITHO_PLOTS", "async")
+PROCESSES = 1
+
+_POOL = None
+_FUTURES = []
+_DEFERRED = []
+_MISSING = set()
+
+def configure(mode=None, processes=None):
+    global MODE, PROCESSES
+    if mode is not None:
+        if mode not in ("async", "sync", "defer", "off"):
+            raise ValueError(f"unknown plot mode {mode!r}")
+        MODE = mode
+    if processes is not None:
+        PROCESSES = processes
+
+def _pool():
+    global _POOL
+    if _POOL is None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        _POOL = ProcessPoolExecutor(max_workers=PROCESSES, initializer=_init_worker)
+        atexit.register(flush)
+    return _POOL
+
+def _init_worker():
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+def _renderable(path):
+    """Whether the library for path is installed, warning once per library if not."""
+    library = "plotly" if path.endswith(".html") else "matplotlib"
+    if library in _MISSING:
+        return False
+    if importlib.util.find_spec(library) is None:
+        _MISSING.add(library)
+        warnings.warn(f"{library} is not installed: skipping its figures (--no-plots silences this)",
+                      stacklevel=3)
+        return False
+    return True
+
+def submit(kind, path, **data):
+    """Queue one figure; data holds arrays, labels and title / axis options."""
+    if MODE == "off":
+        return
+    if MODE == "defer":
+        _DEFERRED.append((kind, path, data))
+        return
+    if not _renderable(path):
+        return
+    if MODE == "sync":
+        render(kind, path, data)
+        return
+    _FUTURES.append(_pool().submit(render, kind, path, data))
+
+def flush(directory=None):
+    """
+    Wait for queued renders (re-raising the first failure), or in defer
+    mode write the recorded jobs to directory/report_jobs.{json,npz}.
+    """
+    futures = list(_FUTURES)
+    _FUTURES.clear()
+    for future in futures:
+        future.result()
+
+    if MODE == "defer" and _DEFERRED and directory is not None:
+        save_jobs(directory, _DEFERRED)
+        _DEFERRED.clear()
+
+def save_jobs(directory, jobs):
+    os.makedirs(directory, exist_ok=True)
+    manifest, arrays = [], {}
+    for i, (kind, path, data) in enumerate(jobs):
+        entry = {"kind": kind, "path": os.path.relpath(path, directory), "options": {}, "arrays": []}
+        for name, value in data.items():
+            if isinstance(value, np.ndarray) or (isinstance(value, list) and value
+                                                 and not isinstance(value[0], str)):
+                arrays[f"{i}:{name}"] = np.asarray(value)
+                entry["arrays"].append(name)
+            else:
+                entry["options"][name] = value
+        manifest.append(entry)
+
+    np.savez(os.path.join(directory, "report_jobs.npz"), **arrays)
+    with open(os.path.join(directory, "report_jobs.json"), "w") as f:
+        json.dump(manifest, f, indent=1, default=float)
+
+def render_saved(directory):
+    """Render every job stored by a deferred run; returns the number rendered."""
+    with open(os.path.join(directory, "report_jobs.json")) as f:
+        manifest = json.load(f)
+    with np.load(os.path.join(directory, "report_jobs.npz")) as arrays:
+        for i, entry in enumerate(manifest):
+            data = dict(entry["options"])
+            for name in entry["arrays"]:
+                data[name] = arrays[f"{i}:{name}"]
+            render(entry["kind"], os.path.join(directory, entry["path"]), data)
+    return len(manifest)
+
+# ============================================================
+# Renderers
+# ============================================================
+def render(kind, path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".html"):
+        _render_plotly(kind, path, dict(data))
+    else:
+        _render_matplotlib(kind, path, dict(data))
+
+def _render_matplotlib(kind, path, d):
+    try:
+        import matplotlib
+    except ImportError:
+        raise RuntimeError(f"{path}: figures need matplotlib (or run with --no-plots)") from None
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=d.pop("figsize", (6, 5) if kind in ("image", "heatmap") else None))
+    if kind == "image":
+        plt.imshow(d["z"], cmap=d.get("cmap", "gray"))
+        if d.get("colorbar"):
+            plt.colorbar(label=d.get("zlabel", ""))
+    elif kind == "heatmap":
+        x, y = d["x"], d["y"]
+        plt.imshow(d["z"], origin="lower", extent=[x[0], x[-1], y[0], y[-1]],
+                   aspect="auto", cmap=d.get("cmap", "coolwarm"))
+        plt.colorbar(label=d.get("zlabel", ""))
+    elif kind == "lines":
+        x = d.get("x")
+        for label, y in zip(d.get("labels") or [None] * len(d["ys"]), d["ys"]):
+            if x is None:
+                plt.plot(y, label=label, marker=d.get("marker"))
+            else:
+                plt.plot(x, y, label=label, marker=d.get("marker"))
+        if d.get("labels"):
+            plt.legend()
+    elif kind == "hist":
+        plt.hist(d["values"], bins=d.get("bins", 10))
+    elif kind == "bar":
+        plt.bar(d["labels"], d["values"])
+    else:
+        raise ValueError(f"unknown figure kind {kind!r}")
+
+    if d.get("xlabel"):
+        plt.xlabel(d["xlabel"])
+    if d.get("ylabel"):
+        plt.ylabel(d["ylabel"])
+    if d.get("title"):
+        plt.title(d["title"])
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+def _render_plotly(kind, path, d):
+    try:
+        import plotly.graph_objects as go
+    except ImportError:
+        raise RuntimeError(f"{path}: HTML figures need plotly (or run with --no-plots)") from None
+
+    fig = go.Figure()
+    if kind in ("image", "heatmap"):
+        fig.add_trace(go.Heatmap(z=d["z"], x=d.get("x"), y=d.get("y"),
+                                 colorscale=d.get("colorscale", "RdBu"),
+                                 colorbar=dict(title=d.get("zlabel", ""))))
+    elif kind == "lines":
+        x = d.get("x")
+        for label, y in zip(d.get("labels") or [None] * len(d["ys"]), d["ys"]):
+            fig.add_trace(go.Scatter(x=x, y=y, mode="lines+markers" if d.get("marker") else "lines",
+                                     name=label))
+    elif kind == "hist":
+        fig.add_trace(go.Histogram(x=d["values"], nbinsx=d.get("bins", 10)))
+    elif kind == "bar":
+        fig.add_trace(go.Bar(x=list(d["labels"]), y=d["values"]))
+    else:
+        raise ValueError(f"unknown figure kind {kind!r}")
+
+    fig.update_layout(title=d.get("title"), xaxis_title=d.get("xlabel"), yaxis_title=d.get("ylabel"))
+    fig.write_html(path)
@@ -0,0 +1,63 @@
+import numpy as np
+
+# ============================================================
+# Dill exposure -> Mack development
+# ============================================================
+# Parameters travel as a dict with the names used in the scripts.
+
+RESIST = {
+    "C": 1.2,                   # Dill exposure rate constant
+    "Rmax": 1.0,                # Mack maximum development rate
+    "M0": 0.5,                  # Mack threshold PAC concentration
+    "n": 2.5,                   # Mack dissolution selectivity
+    "develop_time": 1.0,
+    "resist_thickness": 0.55,
+}
+
+def dill(aerial, C):
+    return np.exp(-C * aerial)
+
+def mack_rate(M, Rmax, M0, n):
+    return Rmax / (1 + (M / M0)**n)
+
+def clear_depth(aerial, resist=None):
+    r = {**RESIST, **(resist or {})}
+    M = dill(aerial, r["C"])
+    return mack_rate(M, r["Rmax"], r["M0"], r["n"]) * r["develop_time"]
+
+def clear_depth_grad(aerial, resist=None, second=False):
+    """
+    Clear depth and its derivative(s) with respect to the aerial image.
+    With q = (M / M0)^n and dM/dI = -C M:
+
+        d clear / dI   =  Rmax t n C q / (1 + q)^2
+        d2 clear / dI2 = -Rmax t (n C)^2 q (1 - q) / (1 + q)^3
+    """
+    r = {**RESIST, **(resist or {})}
+    q = (dill(aerial, r["C"]) / r["M0"])**r["n"]
+    scale = r["Rmax"] * r["develop_time"]
+    clear = scale / (1 + q)
+    d1 = scale * r["n"] * r["C"] * q / (1 + q)**2
+    if not second:
+        return clear, d1
+    d2 = -scale * (r["n"] * r["C"])**2 * q * (1 - q) / (1 + q)**3
+    return clear, d1, d2
+
+def develop(aerial, resist=None):
+    """Printed (cleared) map: clear depth beyond the resist thickness."""
+    r = {**RESIST, **(resist or {})}
+    return clear_depth(aerial, r) > r["resist_thickness"]
+
+def aerial_threshold(resist=None):
+    """
+    Aerial intensity at which the resist just clears.  The chain is
+    monotone in the aerial image, so develop(a) == (a > aerial_threshold).
+    """
+    r = {**RESIST, **(resist or {})}
+    ratio = r["Rmax"] * r["develop_time"] / r["resist_thickness"] - 1
+    if ratio <= 0:
+        return np.inf
+    M = r["M0"] * ratio ** (1 / r["n"])
+    if M >= 1:
+        return 0.0
+    return -np.log(M) / r["C"]
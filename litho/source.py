@@ -0,0 +1,51 @@
+import numpy as np
+
+# ============================================================
+# Illumination source shapes
+# ============================================================
+# Sources are plain dicts, e.g. {"shape": "annular", "sigma_in": 0.5,
+# "sigma_out": 0.8}, so they can be hashed, cached and written into
+# experiment configs.  Coordinates are in sigma units (pupil radius = 1).
+
+def conventional(sx, sy, sigma=0.7):
+    return np.hypot(sx, sy) <= sigma
+
+def annular(sx, sy, sigma_in=0.5, sigma_out=0.8):
+    r = np.hypot(sx, sy)
+    return (r >= sigma_in) & (r <= sigma_out)
+
+def dipole(sx, sy, sigma_c=0.6, sigma_r=0.2, axis="x"):
+    if axis == "y":
+        sx, sy = sy, sx
+    return (np.hypot(sx - sigma_c, sy) <= sigma_r) | (np.hypot(sx + sigma_c, sy) <= sigma_r)
+
+def quadrupole(sx, sy, sigma_c=0.6, sigma_r=0.2, rotated=False):
+    if rotated:
+        # quasar: poles on the diagonals
+        sx, sy = (sx + sy) / np.sqrt(2), (sy - sx) / np.sqrt(2)
+    return dipole(sx, sy, sigma_c, sigma_r, "x") | dipole(sx, sy, sigma_c, sigma_r, "y")
+
+SOURCES = {
+    "conventional": conventional,
+    "annular": annular,
+    "dipole": dipole,
+    "quadrupole": quadrupole,
+}
+
+def source_points(source, step=0.05):
+    """Discretised source: (sx, sy, weight) with weights summing to 1."""
+    params = dict(source)
+    shape = SOURCES[params.pop("shape")]
+
+    g = np.arange(-1.0, 1.0 + step / 2, step)
+    sx, sy = np.meshgrid(g, g)
+    inside = shape(sx, sy, **params)
+    if not inside.any():
+        raise ValueError(f"source {source!r} has no points at step {step}")
+
+    sx, sy = sx[inside], sy[inside]
+    weight = np.full(sx.size, 1.0 / sx.size)
+    return sx, sy, weight
+
+def source_key(source):
+    return tuple(sorted(source.items()))
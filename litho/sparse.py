@@ -0,0 +1,123 @@
+import numpy as np
+
+# ============================================================
+# Sparse-mask imaging
+# ============================================================
+# Contact holes and isolated lines leave >99% of the field empty, so
+# instead of transforming the whole field we add one truncated PSF
+# footprint per horizontal run of equal mask value.  A run of length L
+# contributes the PSF box-filtered over L columns, which we read off a
+# column-wise cumulative sum of the kernel, so the cost is one numpy
+# slice-add per run rather than one per pixel.
+#
+# Truncation is not free: the PSF tails are long (sinc^2), and dropping
+# values below 1e-4 of the peak removes ~2% of the kernel's energy.  A
+# mask in [0, 1] is then off by at most truncation_error(kernel, tol)
+# of the open-frame intensity; on the day-script geometries the actual
+# error reaches ~0.3% of the peak, enough to move threshold edges.  So
+# "auto" imaging is exact (tol = 0, the sparse path only when it wins
+# with the full kernel) and DEFAULT_TOL is for callers that opt in to
+# the truncated sparse / rects / incremental paths.
+
+DEFAULT_TOL = 1e-4          # drop PSF values below tol * peak
+
+# Relative cost constants (units: one numpy element operation).
+# Calibrated on a 256-512 grid; they only need to place the crossover
+# within a factor of ~2.
+ITER_COST = 4000            # python overhead per run
+RUN_COST = 4.0              # per footprint element (gather + add)
+FFT_COST = 2.0              # per element per log2(size) per transform
+DENSE_FILL = 0.25           # above this fill never try the sparse path
+
+def truncation_halfwidth(kernel, tol=DEFAULT_TOL):
+    """Smallest h such that every value outside the central (2h+1)^2 box is < tol * peak."""
+    ky, kx = kernel.shape
+    yy, xx = np.nonzero(kernel >= tol * kernel.max())
+    return int(max(np.abs(yy - ky // 2).max(), np.abs(xx - kx // 2).max()))
+
+def truncation_error(kernel, tol=DEFAULT_TOL):
+    """
+    Bound on the aerial error of truncating kernel at tol, as a fraction
+    of the open-frame intensity (the kernel sum), for masks in [0, 1].
+    """
+    ky, kx = kernel.shape
+    h = truncation_halfwidth(kernel, tol)
+    inside = kernel[ky//2 - h : ky//2 + h + 1, kx//2 - h : kx//2 + h + 1]
+    return float((np.abs(kernel).sum() - np.abs(inside).sum()) / kernel.sum())
+
+def truncate_psf(kernel, tol=DEFAULT_TOL):
+    ky, kx = kernel.shape
+    h = truncation_halfwidth(kernel, tol)
+    return kernel[ky//2 - h : ky//2 + h + 1, kx//2 - h : kx//2 + h + 1]
+
+def mask_runs(mask):
+    """Horizontal runs of constant non-zero value: (row, x0, length, value) arrays."""
+    ny, nx = mask.shape
+    pad = np.zeros((ny, nx + 2), dtype=mask.dtype)
+    pad[:, 1:-1] = mask
+    ys, xs = np.nonzero(pad[:, 1:] != pad[:, :-1])
+
+    # consecutive boundaries in the same row delimit a run
+    same_row = ys[:-1] == ys[1:]
+    y = ys[:-1][same_row]
+    x0 = xs[:-1][same_row]
+    length = xs[1:][same_row] - x0
+    value = mask[y, x0]
+
+    keep = value != 0
+    return y[keep], x0[keep], length[keep], value[keep]
+
+# ============================================================
+# Method selection
+# ============================================================
+def sparse_cost(mask, h):
+    edges = (np.count_nonzero(mask[:, 1:] != mask[:, :-1])
+             + np.count_nonzero(mask[:, 0]) + np.count_nonzero(mask[:, -1]))
+    n_runs = edges // 2
+    nnz = np.count_nonzero(mask)
+    k = 2 * h + 1
+    return n_runs * (ITER_COST + RUN_COST * k * 2 * h) + RUN_COST * k * nnz
+
+def fft_cost(mask, kernel):
+    from litho.fft import fast_shape
+
+    shape = fast_shape(mask.shape, kernel.shape)
+    size = shape[0] * shape[1]
+    return 3 * FFT_COST * size * np.log2(size)
+
+def choose_method(mask, kernel, tol=0.0):
+    """"sparse" or "fft", whichever the cost model says is cheaper."""
+    if np.count_nonzero(mask) > DENSE_FILL * mask.size:
+        return "fft"
+    h = truncation_halfwidth(kernel, tol)
+    if sparse_cost(mask, h) < fft_cost(mask, kernel):
+        return "sparse"
+    return "fft"
+
+# ============================================================
+# Shifted-kernel summation
+# ============================================================
+def sparse_convolve(mask, kernel):
+    """
+    "same"-mode convolution of mask with an odd, centred kernel, built
+    from one box-filtered kernel footprint per mask run.
+    """
+    ny, nx = mask.shape
+    k = kernel.shape[0]
+    h = k // 2
+    out = np.zeros((ny + 2 * h, nx + 2 * h))
+
+    # S[:, j] = sum of kernel columns < j
+    S = np.zeros((k, k + 1))
+    np.cumsum(kernel, axis=1, out=S[:, 1:])
+
+    footprints = {}
+    for y, x0, length, value in zip(*mask_runs(mask)):
+        if length not in footprints:
+            c = np.arange(length + 2 * h)
+            hi = np.minimum(c, 2 * h) + 1
+            lo = np.maximum(c - length + 1, 0)
+            footprints[length] = S[:, hi] - S[:, lo]
+        out[y : y + k, x0 : x0 + length + 2 * h] += value * footprints[length]
+
+    return out[h : h + ny, h : h + nx]
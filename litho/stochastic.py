@@ -0,0 +1,180 @@
+import numpy as np
+
+from litho import fft, resist, streams, telemetry
+
+# ============================================================
+# Photon / acid / quencher stochastic resist
+# ============================================================
+# Per trial and pixel, with photons per unit aerial intensity p:
+#
+#   n     ~ Poisson(I p)                      absorbed photons
+#   acid  ~ Binomial(pag, 1 - exp(-C n / p))  Dill conversion of PAG
+#   q     ~ Poisson(quencher)                 base quencher loading
+#   net   = max(G ⊗ (acid - q), 0)            PEB diffusion, then
+#                                             acid-quencher neutralisation
+#   M     = 1 - net / pag                     remaining inhibitor
+#   clear = Mack(M) * develop_time
+#
+# Without quencher or blur and with pag -> infinity, M -> exp(-C I),
+# which is the deterministic Dill / Mack chain of litho.resist, so the
+# two models share parameters.  Diffusion is linear, so acid and
+# quencher are blurred together: one batched rfft2 / irfft2 pair per
+# chunk of trials, multiplied by the analytic Gaussian transfer
+# function on a grid padded by 4 sigma (no wrap-around).
+#
+# draws="normal" replaces the three counts by one float32 Gaussian for
+# acid - quencher, with the photon variance carried through the Dill
+# conversion to first order; its mean and std maps are computed once
+# per image, so a trial costs one normal draw per pixel.  Accurate
+# once I p and pag are in the tens.
+#
+# As in litho.device, only the window where noise can flip the print is
+# simulated: the bounding box of the pixels whose diffused mean net
+# acid is within z std of the clearing level, plus the diffusion reach
+# 4 blur around it.  The rest of the field is the deterministic mean
+# (acid, clear and printed), and its diffused acid is added to the
+# window, so trials of a contact or line end in a large field cost the
+# window, not the field.  z=None simulates every pixel.
+
+ACID = {
+    "pag": 20.0,                # PAG molecules per pixel
+    "quencher": 2.0,            # mean quencher molecules per pixel
+    "blur": 1.5,                # acid diffusion length (sigma, pixels)
+    "draws": "exact",           # or "normal"
+}
+
+CHUNK_BYTES = 64e6
+
+_TRANSFER = {}
+
+def diffusion_transfer(shape, blur, dtype=np.float64):
+    """rfft2-domain Gaussian of sigma blur (pixels) for a padded grid of shape."""
+    key = (tuple(shape), blur, np.dtype(dtype).str)
+    if key not in _TRANSFER:
+        fy = np.fft.fftfreq(shape[0])[:, None]
+        fx = np.fft.rfftfreq(shape[1])[None, :]
+        _TRANSFER[key] = np.exp(-2 * (np.pi * blur)**2 * (fy**2 + fx**2)).astype(dtype)
+    return _TRANSFER[key]
+
+def diffuse(stack, blur):
+    """Linear (non-periodic) Gaussian blur of the last two axes of a stack."""
+    if blur <= 0:
+        return stack
+    ny, nx = stack.shape[-2:]
+    margin = int(np.ceil(4 * blur))
+    shape = (fft.next_fast_len(ny + margin), fft.next_fast_len(nx + margin))
+    spectrum = fft.rfft2(stack, s=shape)
+    spectrum *= diffusion_transfer(shape, blur, spectrum.real.dtype)
+    return fft.irfft2(spectrum, s=shape, overwrite_x=True)[..., :ny, :nx]
+
+def _moments(aerial, photons, pag, quencher, C):
+    """
+    Mean and std of acid - quencher per pixel, propagating the photon
+    variance through the Dill conversion to first order.
+    """
+    expected = aerial * photons
+    p_convert = -np.expm1(-C * aerial)
+    dp = C / photons * np.exp(-C * aerial)
+    var = pag * p_convert * (1 - p_convert) + (pag * dp)**2 * expected + quencher
+    return pag * p_convert - quencher, np.sqrt(var)
+
+def active_window(mean, std, threshold, reach, z):
+    """
+    (outer, inner) slice pairs: the simulated window, and the pixels of
+    it within z std of threshold, relative to the window.  None if no
+    pixel is.
+    """
+    near = np.abs(mean - threshold) < z * std
+    if not near.any():
+        return None
+    outer, inner = [], []
+    for axis, n in enumerate(near.shape):
+        idx = np.nonzero(near.any(axis=1 - axis))[0]
+        lo, hi = max(idx[0] - reach, 0), min(idx[-1] + 1 + reach, n)
+        outer.append(slice(lo, hi))
+        inner.append(slice(idx[0] - lo, idx[-1] + 1 - lo))
+    return tuple(outer), tuple(inner)
+
+def _exact(rng, shape, aerial, photons, pag, quencher, C):
+    """acid - quencher counts: Poisson photons, binomial PAG conversion, Poisson quencher."""
+    n = rng.poisson(aerial * photons, size=shape)
+    generated = rng.binomial(pag, -np.expm1(-C * n / photons))
+    return generated - rng.poisson(quencher, size=shape)
+
+def trials(aerial, n_trials, photons, rng=None, acid=None, resist_params=None, chunk=None, z=6.0):
+    """
+    Yield dicts of (k, ny, nx) stacks - net acid, clear depth, printed -
+    for n_trials stochastic realisations of a (dosed) aerial image,
+    chunk trials at a time (default: CHUNK_BYTES of work arrays).  rng
+    is a seed / generator or a list of n_trials per-trial streams.
+    Pixels more than z std from clearing keep their mean (z=None: none).
+    """
+    rng = streams.as_rng(rng)
+    a = {**ACID, **(acid or {})}
+    r = {**resist.RESIST, **(resist_params or {})}
+    aerial = np.asarray(aerial, dtype=float)
+    pag, blur = a["pag"], a["blur"]
+    chunk = chunk or max(1, int(CHUNK_BYTES // (aerial.size * 8 * 4)))
+    if a["draws"] not in ("exact", "normal"):
+        raise ValueError(f"unknown draws {a['draws']!r}")
+
+    def develop(net):
+        M = np.clip(1 - net / pag, 0, 1)
+        clear = resist.mack_rate(M, r["Rmax"], r["M0"], r["n"]) * r["develop_time"]
+        return clear, clear > r["resist_thickness"]
+
+    mean, std = _moments(aerial, photons, pag, a["quencher"], r["C"])
+    if a["draws"] == "exact":
+        # exact mean of the binomial conversion over Poisson photons
+        mean = -pag * np.expm1(aerial * photons * np.expm1(-r["C"] / photons)) - a["quencher"]
+    nominal = np.maximum(diffuse(mean, blur), 0)
+    threshold = -pag * np.expm1(-r["C"] * resist.aerial_threshold(r))
+    reach = int(np.ceil(4 * blur)) if blur > 0 else 0
+    if z is None:
+        window = tuple(slice(0, n) for n in aerial.shape), tuple(slice(0, n) for n in aerial.shape)
+    else:
+        window = active_window(nominal, std, threshold, reach, z)
+    if window is not None:
+        outer, inner = window
+        sub = aerial[outer]
+        # mean acid diffusing into the window from the deterministic rest
+        rest = mean.copy()
+        rest[outer] = 0
+        rest = diffuse(rest, blur)[outer] if blur > 0 else rest[outer]
+        if a["draws"] == "normal":
+            mean_sub, std_sub = mean[outer].astype(np.float32), std[outer].astype(np.float32)
+    clear_nominal, printed_nominal = develop(nominal)
+
+    for start in range(0, n_trials, chunk):
+        k = min(chunk, n_trials - start)
+        net = np.repeat(nominal[None], k, axis=0)
+        clear = np.repeat(clear_nominal[None], k, axis=0)
+        printed = np.repeat(printed_nominal[None], k, axis=0)
+        if window is None:
+            telemetry.count("trials", k)
+            yield {"acid": net, "clear": clear, "printed": printed}
+            continue
+        with telemetry.timer("noise"):
+            if a["draws"] == "normal":
+                species = mean_sub + std_sub * streams.batch(
+                    rng, start, k, lambda g, lead: g.standard_normal(lead + sub.shape, dtype=np.float32))
+            else:
+                species = streams.batch(rng, start, k, lambda g, lead: _exact(
+                    g, lead + sub.shape, sub, photons, pag, a["quencher"], r["C"])).astype(np.float32)
+        with telemetry.timer("diffusion"):
+            inside = np.maximum(diffuse(species, blur) + rest, 0)
+        with telemetry.timer("resist"):
+            clear_sub, printed_sub = develop(inside[(slice(None),) + inner])
+        target = (slice(None),) + tuple(slice(o.start + i.start, o.start + i.stop) for o, i in zip(outer, inner))
+        net[target] = inside[(slice(None),) + inner]
+        clear[target] = clear_sub
+        printed[target] = printed_sub
+        telemetry.count("trials", k)
+        yield {"acid": net, "clear": clear, "printed": printed}
+
+def simulate(aerial, n_trials, photons, metric, rng=None, acid=None, resist_params=None, chunk=None):
+    """metric(printed stack, clear stack) per chunk, concatenated over all trials."""
+    out = []
+    for t in trials(aerial, n_trials, photons, rng, acid, resist_params, chunk):
+        out.append(np.asarray(metric(t["printed"], t["clear"])))
+    return np.concatenate(out)
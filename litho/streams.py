@@ -0,0 +1,72 @@
+import hashlib
+
+import numpy as np
+
+# ============================================================
+# Counter-based random streams
+# ============================================================
+# Every Monte Carlo trial draws from its own Philox generator:
+#
+#   key     = hash(run seed, site id)      2 x 64 bit Philox key
+#   counter = [0, 0, trial, 0]             a 2^128-block range per trial
+#
+# so the numbers of (seed, site, trial) do not depend on which other
+# sites or trials run, in what order, in which process, or how trials
+# are batched.  A subset of sites (an ROI) or of trials can be
+# regenerated on its own, and a single trial replayed exactly.
+#
+# Sites and seeds are non-negative ints or strings (hashed).  Batched
+# samplers (litho.noise, litho.stochastic, litho.device) take either
+# one generator / seed, drawing a whole chunk at once as before, or a
+# list of per-trial streams; batch() hides the difference.
+
+_KEYS = {}
+
+def _word(value):
+    if isinstance(value, (str, bytes)):
+        data = value.encode() if isinstance(value, str) else value
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+    value = int(value)
+    if value < 0:
+        raise ValueError(f"stream seeds and site ids must be non-negative, got {value}")
+    return value
+
+def site_key(seed, site=0):
+    """Philox key of a (run seed, site id) pair."""
+    words = (_word(seed), _word(site))
+    if words not in _KEYS:
+        _KEYS[words] = np.random.SeedSequence(words).generate_state(2, np.uint64)
+    return _KEYS[words]
+
+def stream(seed, site=0, trial=0):
+    """Generator for one trial of one site."""
+    counter = np.array([0, 0, _word(trial), 0], dtype=np.uint64)
+    return np.random.Generator(np.random.Philox(key=site_key(seed, site), counter=counter))
+
+def trial_streams(seed, site, trials):
+    """Per-trial generators of a site; trials is a count or an iterable of trial ids."""
+    if np.ndim(trials) == 0:
+        trials = range(int(trials))
+    return [stream(seed, site, t) for t in trials]
+
+def new_seed():
+    """Fresh run seed from OS entropy, for unseeded runs."""
+    return np.random.SeedSequence().entropy
+
+def as_rng(rng):
+    """A list of per-trial streams as is, anything else through default_rng."""
+    if isinstance(rng, (list, tuple)):
+        return list(rng)
+    return np.random.default_rng(rng)
+
+def batch(rng, start, k, draw):
+    """
+    draw(generator, lead) for trials start .. start + k: one call with
+    lead = (k,) on a single generator, or one call per trial with
+    lead = () on per-trial streams, stacked along a new first axis.
+    """
+    if isinstance(rng, list):
+        if start + k > len(rng):
+            raise ValueError(f"{len(rng)} trial streams for trials up to {start + k}")
+        return np.stack([draw(g, ()) for g in rng[start:start + k]])
+    return draw(rng, (k,))
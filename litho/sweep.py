@@ -0,0 +1,78 @@
+import numpy as np
+
+from litho import cache, config
+
+# ============================================================
+# Sweep scheduling
+# ============================================================
+# spec["sweep"] maps dotted spec paths to axes; spec["sampling"] picks
+# how they are combined:
+#
+#   {"method": "grid"}                          Cartesian product
+#   {"method": "lhs", "samples": 64, "seed": 0} Latin hypercube
+#   {"method": "adaptive", ...}                 grid refined near the
+#                                               spec boundary, see
+#                                               litho.adaptive
+#
+# Grid axes are value lists or {"linspace"|"arange": ...}.  A Latin
+# hypercube also accepts continuous {"range": [lo, hi]} axes and draws
+# list axes by stratified index.  Points are returned grouped by
+# pattern + optics, so each aerial image is built once and then reused
+# by every dose / resist / metric point that needs it.
+
+def _axis_values(axis):
+    if isinstance(axis, dict) and "range" in axis:
+        raise ValueError(f"{axis!r}: range axes need lhs sampling")
+    return config.axis_values(axis)
+
+def grid(sweep):
+    axes = {path: _axis_values(axis) for path, axis in sweep.items()}
+    shape = tuple(len(v) for v in axes.values())
+    points = []
+    for index in np.ndindex(*shape):
+        points.append((index, {path: axes[path][i].item() for path, i in zip(axes, index)}))
+    return axes, shape, points
+
+def latin_hypercube(sweep, samples, seed=None):
+    rng = np.random.default_rng(seed)
+    axes = {}
+    for path, axis in sweep.items():
+        u = (rng.permutation(samples) + rng.random(samples)) / samples
+        if isinstance(axis, dict) and "range" in axis:
+            lo, hi = axis["range"]
+            axes[path] = lo + u * (hi - lo)
+        else:
+            values = config.axis_values(axis)
+            axes[path] = values[(u * len(values)).astype(int)]
+    points = [((i,), {path: v[i].item() for path, v in axes.items()}) for i in range(samples)]
+    return axes, (samples,), points
+
+def sample(spec):
+    sampling = spec.get("sampling") or {"method": "grid"}
+    method = sampling.get("method", "grid")
+    if method == "grid":
+        return grid(spec["sweep"])
+    if method == "lhs":
+        return latin_hypercube(spec["sweep"], int(sampling["samples"]), sampling.get("seed"))
+    if method == "adaptive":
+        raise ValueError("adaptive sampling depends on results; run it through litho.adaptive")
+    raise ValueError(f"unknown sampling method {method!r}")
+
+def point_spec(spec, assignment):
+    """Copy of spec with the sweep assignment {path: value} applied."""
+    point = config.merge(spec, {})
+    for path, value in assignment.items():
+        config.set_path(point, path, value)
+    return point
+
+def optics_key(point):
+    return cache.digest([point["pattern"], point["optics"]])
+
+def schedule(spec):
+    """(axes, shape, [(index, point spec), ...]) grouped by shared optics."""
+    axes, shape, values = sample(spec)
+    groups = {}
+    for index, assignment in values:
+        point = point_spec(spec, assignment)
+        groups.setdefault(optics_key(point), []).append((index, point))
+    return axes, shape, [item for group in groups.values() for item in group]
@@ -0,0 +1,114 @@
+import hashlib
+import os
+
+import numpy as np
+
+from litho import cache, fft
+from litho.source import source_key, source_points
+
+# ============================================================
+# Hopkins imaging with SOCS kernels
+# ============================================================
+# With A[f, s] = sqrt(S(s)) * P(f + s) over pupil frequencies f and
+# source points s, the transmission cross-coefficient is TCC = A A^H.
+# Its eigenvectors (left singular vectors of A) are the coherent SOCS
+# kernels and the eigenvalues their weights:
+#
+#     I(x) = sum_k  w_k |ifft(M(f) * phi_k(f))|^2
+#
+# Frequencies are integer indices on the simulation grid, as for
+# circular_pupil(nx, pupil_radius).  Kernels are kept until the
+# discarded eigenvalues hold less than `tol` of the total energy; the
+# hard pupil edge gives a long eigenvalue tail, but tol=0.05 (about 20
+# kernels for sigma=0.7) already keeps the image error near 1e-3.
+# An open frame images to 1 for sources inside the pupil.
+
+def shifted_pupil(fx, fy, pupil_radius, defocus=0.0):
+    """Circular pupil with optional defocus (waves at the pupil edge)."""
+    rho2 = (fx * fx + fy * fy) / pupil_radius**2
+    pupil = (rho2 <= 1.0).astype(complex)
+    if defocus:
+        pupil *= np.exp(2j * np.pi * defocus * rho2)
+    return pupil
+
+def compute_socs(pupil_radius, source, step=0.1, tol=0.05, defocus=0.0):
+    sx, sy, weight = source_points(source, step)
+    sx, sy = sx * pupil_radius, sy * pupil_radius
+
+    # every frequency any shifted pupil can pass
+    rmax = pupil_radius + np.hypot(sx, sy).max()
+    r = int(np.ceil(rmax))
+    fy, fx = np.mgrid[-r:r + 1, -r:r + 1]
+    keep = np.hypot(fx, fy) <= rmax
+    fy, fx = fy[keep], fx[keep]
+
+    A = shifted_pupil(fx[:, None] + sx, fy[:, None] + sy, pupil_radius, defocus)
+    A *= np.sqrt(weight)
+
+    U, s, _ = np.linalg.svd(A, full_matrices=False)
+    energy = s**2
+    n_keep = int(np.searchsorted(np.cumsum(energy) / energy.sum(), 1.0 - tol)) + 1
+
+    return {
+        "fy": fy,
+        "fx": fx,
+        "kernels": U[:, :n_keep].T.copy(),
+        "weights": energy[:n_keep],
+        "energy": energy.sum(),
+    }
+
+# ============================================================
+# Kernel cache (memory + disk)
+# ============================================================
+_SOCS_CACHE = {}
+
+def socs_kernels(pupil_radius, source, step=0.1, tol=0.05, defocus=0.0, cache_dir=None, disk=True):
+    """
+    SOCS kernels from memory, then disk (cache_dir, default the current
+    cache.CACHE_DIR), else computed; disk=False or a disabled stage
+    cache (--no-cache) keeps them in memory only.
+    """
+    key = (pupil_radius, source_key(source), step, tol, defocus)
+    if key in _SOCS_CACHE:
+        return _SOCS_CACHE[key]
+
+    path = None
+    if disk and cache.ENABLED:
+        cache_dir = cache_dir or cache.CACHE_DIR
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        path = os.path.join(cache_dir, "socs", f"{digest}.npz")
+
+    if path is not None and os.path.exists(path):
+        with np.load(path) as data:
+            socs = {name: data[name] for name in data.files}
+    else:
+        socs = compute_socs(pupil_radius, source, step, tol, defocus)
+        if path is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.savez(path, **socs)
+
+    _SOCS_CACHE[key] = socs
+    return socs
+
+# ============================================================
+# Aerial image
+# ============================================================
+def socs_aerial(mask, socs, dose=1.0):
+    """Partially coherent aerial image: one FFT of the mask plus one inverse FFT per kernel."""
+    ny, nx = mask.shape
+    fy, fx = socs["fy"], socs["fx"]
+    if 2 * max(np.abs(fy).max(), np.abs(fx).max()) >= min(ny, nx):
+        raise ValueError("grid too small for the pupil + source bandwidth")
+
+    iy, ix = fy % ny, fx % nx
+    spectrum = fft.fft2(mask)[iy, ix]
+
+    stack = np.zeros((len(socs["weights"]), ny, nx), dtype=complex)
+    stack[:, iy, ix] = socs["kernels"] * spectrum
+    field = fft.ifft2(stack, overwrite_x=True)
+
+    aerial = np.einsum("k,kyx->yx", socs["weights"], field.real**2 + field.imag**2)
+    return aerial * dose
+
+def hopkins_aerial(mask, pupil_radius, source, dose=1.0, **kwargs):
+    return socs_aerial(mask, socs_kernels(pupil_radius, source, **kwargs), dose)
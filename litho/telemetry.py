@@ -0,0 +1,123 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+
+# ============================================================
+# Per-stage timers and counters
+# ============================================================
+# Pipeline code wraps its stages in
+#
+#   with telemetry.timer("imaging"):
+#       ...
+#
+# which adds wall time and a call to STAGES["imaging"]; count() adds to
+# plain counters (trials, photons drawn, cache hits, ...).  Timers nest,
+# and each stage records its own inclusive time.  The overhead is one
+# perf_counter pair per call, so it stays on in production runs.
+#
+# profile("cprofile" | "tracemalloc") optionally captures a profile of
+# a whole block; write() stores everything as telemetry.json plus a
+# per-stage telemetry.csv next to the results.
+
+STAGES = {}
+COUNTERS = {}
+PROFILES = {}
+
+def reset():
+    STAGES.clear()
+    COUNTERS.clear()
+    PROFILES.clear()
+
+@contextmanager
+def timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        s = STAGES.setdefault(stage, {"calls": 0, "seconds": 0.0})
+        s["calls"] += 1
+        s["seconds"] += time.perf_counter() - start
+
+def count(name, n=1):
+    COUNTERS[name] = COUNTERS.get(name, 0) + n
+
+@contextmanager
+def profile(kind, out_dir=None, top=25):
+    """
+    cProfile or tracemalloc capture of the block.  The summary (top
+    functions / allocation sites) lands in PROFILES[kind]; with out_dir,
+    cProfile also dumps its raw stats to out_dir/profile.prof.
+    """
+    if kind is None:
+        yield
+        return
+
+    if kind == "cprofile":
+        import cProfile
+        import io
+        import pstats
+
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            text = io.StringIO()
+            pstats.Stats(prof, stream=text).sort_stats("cumulative").print_stats(top)
+            PROFILES[kind] = text.getvalue()
+            if out_dir is not None:
+                os.makedirs(out_dir, exist_ok=True)
+                prof.dump_stats(os.path.join(out_dir, "profile.prof"))
+
+    elif kind == "tracemalloc":
+        import tracemalloc
+
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            PROFILES[kind] = {
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [str(stat) for stat in snapshot.statistics("lineno")[:top]],
+            }
+    else:
+        raise ValueError(f"unknown profiler {kind!r}")
+
+# ============================================================
+# Records
+# ============================================================
+def record(**info):
+    return {
+        "info": info,
+        "stages": {name: dict(s) for name, s in STAGES.items()},
+        "counters": dict(COUNTERS),
+        "profiles": dict(PROFILES),
+    }
+
+def write(out_dir, **info):
+    """telemetry.json (everything) and telemetry.csv (one row per stage) in out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    rec = record(**info)
+    with open(os.path.join(out_dir, "telemetry.json"), "w") as f:
+        json.dump(rec, f, indent=1, default=str)
+
+    with open(os.path.join(out_dir, "telemetry.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["stage", "calls", "seconds", "seconds_per_call"])
+        for name, s in sorted(rec["stages"].items(), key=lambda item: -item[1]["seconds"]):
+            writer.writerow([name, s["calls"], f"{s['seconds']:.6f}",
+                             f"{s['seconds'] / max(s['calls'], 1):.6f}"])
+    return rec
+
+def summary():
+    lines = []
+    for name, s in sorted(STAGES.items(), key=lambda item: -item[1]["seconds"]):
+        lines.append(f"{name:>10}: {s['seconds']:8.3f} s in {s['calls']} calls")
+    return "\n".join(lines)
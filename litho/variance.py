@@ -0,0 +1,79 @@
+import numpy as np
+
+from litho import metrology, resist
+
+# ============================================================
+# First-order stochastic model
+# ============================================================
+# The MC scripts draw N = Poisson(I * p) photons per pixel and develop
+# I~ = N / p, so per pixel
+#
+#   Var(I~)     = I / p
+#   Var(clear)  = clear'(I)^2 * I / p                   (Dill -> Mack)
+#
+# The printed edge is where clear(I~) crosses the resist thickness,
+# i.e. where I~ crosses resist.aerial_threshold.  To first order a
+# perturbation dI at the edge pixel moves the edge by
+#
+#   dx = -d clear / (d clear / dx) = -clear' dI / (clear' dI/dx)
+#
+# and the Mack slope cancels: sigma_edge = sqrt(I_th / p) / |dI/dx|.
+# Noise is white per pixel, so left and right edges are independent
+# and sigma_width = hypot(sigma_left, sigma_right).  One deterministic
+# image replaces the trial loop; compare against MC with sub-pixel
+# edges, since row_edges adds ~1/12 px^2 of quantisation.
+
+def aerial_variance(aerial, photons):
+    return np.asarray(aerial) / photons
+
+def clear_variance(aerial, photons, resist_params=None):
+    _, d1 = resist.clear_depth_grad(aerial, resist_params)
+    return d1**2 * aerial_variance(aerial, photons)
+
+def edge_sigma(aerial, photons, resist_params=None, dose=1.0):
+    """
+    Predicted left / right edge placement sigma (pixels) and width sigma
+    for every row of a (dosed) aerial image, plus the nominal sub-pixel
+    edges.  Rows that never print are NaN.
+    """
+    threshold = resist.aerial_threshold(resist_params)
+    e = metrology.row_edges_subpixel(np.asarray(aerial) * dose, threshold)
+    sigma_i = np.sqrt(threshold / photons)
+    left = sigma_i / e["left_slope"]
+    right = sigma_i / e["right_slope"]
+    return {"left": e["left"], "right": e["right"], "sigma_left": left,
+            "sigma_right": right, "sigma_width": np.hypot(left, right)}
+
+def profile_sigma(profiles, threshold, photons):
+    """
+    Edge sigma (pixels) at the threshold crossing nearest the middle of
+    each (dosed) profile, e.g. litho.opc control-site profiles.
+    """
+    p = np.asarray(profiles, dtype=float) - threshold
+    half = p.shape[-1] // 2
+    sigma = np.full(len(p), np.nan)
+    for i, row in enumerate(p):
+        j = np.nonzero(row[:-1] * row[1:] < 0)[0]
+        if len(j):
+            j = j[np.argmin(np.abs(j + 0.5 - half))]
+            sigma[i] = np.sqrt(threshold / photons) / abs(row[j + 1] - row[j])
+    return sigma
+
+# ============================================================
+# Differentiable form for ILT
+# ============================================================
+def printed_variance(aerial, photons, resist_params=None, steepness=50.0):
+    """
+    Var of the sigmoid printed probability P = sigmoid(s (clear - t)) per
+    pixel and its derivative with respect to the aerial image:
+
+        Var(P) = g^2 I / p,   g = dP/dI = s P (1 - P) clear'
+    """
+    r = {**resist.RESIST, **(resist_params or {})}
+    clear, d1, d2 = resist.clear_depth_grad(aerial, r, second=True)
+    P = 0.5 * (1 + np.tanh(0.5 * steepness * (clear - r["resist_thickness"])))
+    dP = steepness * P * (1 - P)
+    g = dP * d1
+    dg = steepness * (1 - 2 * P) * g * d1 + dP * d2
+    var = g**2 * aerial / photons
+    return var, (2 * g * dg * aerial + g**2) / photons
@@ -75,9 +75,7 @@ aerial_nominal /= aerial_nominal.max()
 # ============================================================
 # Monte Carlo device population
 # ============================================================
-channel_lengths = []
-Id_values = []
-Vt_values = []
+L_eff_pixels = []
 
 for dev in range(N_devices):
 
@@ -103,27 +101,23 @@ for dev in range(N_devices):
     if len(left_edges) < nx * 0.8:
         continue  # skip broken devices
 
-    L_eff_pixels = np.mean(np.array(right_edges) - np.array(left_edges))
+    L_eff_pixels.append(np.mean(np.array(right_edges) - np.array(left_edges)))
 
-    # Convert pixel length to physical variation
-    delta_L = (L_eff_pixels - np.mean(L_eff_pixels)) * 0.5
-
-    L_device = L0 + delta_L
+# ============================================================
+# Device models
+# ============================================================
+# Variation is measured against the population mean, so it can only
+# be computed once every device has been printed
+L_eff_pixels = np.array(L_eff_pixels)
 
-    # Simple sensitivity models
-    Id = Id0 * (L0 / L_device) ** alpha_L
-    Vt = 0.4 + beta_L * (L0 - L_device) / L0
+# Convert pixel length to physical variation
+delta_L = (L_eff_pixels - np.mean(L_eff_pixels)) * 0.5
 
-    channel_lengths.append(L_device)
-    Id_values.append(Id)
-    Vt_values.append(Vt)
+channel_lengths = L0 + delta_L
 
-# ============================================================
-# Convert to arrays
-# ============================================================
-channel_lengths = np.array(channel_lengths)
-Id_values = np.array(Id_values)
-Vt_values = np.array(Vt_values)
+# Simple sensitivity models
+Id_values = Id0 * (L0 / channel_lengths) ** alpha_L
+Vt_values = 0.4 + beta_L * (L0 - channel_lengths) / L0
 
 # ============================================================
 # Statistics